@@ -0,0 +1,250 @@
+'''
+Screen capture backends used by vision.Frame.grab.
+
+Every backend returns (rgb_array, (left, top)) where (left, top) is the screen
+position of the array's top-left pixel, so match positions can be turned back
+into click coordinates whatever area was captured.
+
+@author: NobodyKnowNothing
+'''
+import os
+import glob
+import threading
+import numpy as np
+import cv2
+
+GAME_WINDOW_TITLES = ("Fallout76", "Project76")
+DEFAULT_GAME_RECT = (0, 0, 1280, 800) # Where the game is assumed to be when it can't be located
+
+
+class CaptureBackend:
+    # False for backends that don't read the live screen (no need to focus the game first)
+    needs_window = True
+
+    def grab(self, region=None):
+        """Returns (rgb array, (left, top)). region=(left, top, width, height) in screen coordinates."""
+        raise NotImplementedError
+
+    def game_rect(self):
+        """(left, top, width, height) of the game's client area on screen."""
+        return DEFAULT_GAME_RECT
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiCapture(CaptureBackend):
+    """Full screen grab through pyautogui, what the bot always used."""
+
+    def grab(self, region=None):
+        import pyautogui
+        image = np.asarray(pyautogui.screenshot(region=region))
+        origin = (region[0], region[1]) if region else (0, 0)
+        return image, origin
+
+
+class NativeCapture(CaptureBackend):
+    """GDI BitBlt of the game window's client rect only.
+
+    The device contexts and bitmap are kept between grabs and only rebuilt
+    when the capture size changes. Falls back to the whole primary screen
+    when the game window can't be found.
+    """
+
+    def __init__(self, window_titles=GAME_WINDOW_TITLES, client_rect=None):
+        import win32gui, win32ui, win32con
+        self.win32gui, self.win32ui, self.win32con = win32gui, win32ui, win32con
+        self.window_titles = window_titles
+        # Optional callable returning (left, top, width, height) of the game client area
+        self.client_rect = client_rect
+        self.hwnd = 0
+        self._size = None
+        self._src_dc = None
+        self._mfc_dc = None
+        self._mem_dc = None
+        self._bitmap = None
+
+    def _find_window(self):
+        if self.hwnd and self.win32gui.IsWindow(self.hwnd):
+            return self.hwnd
+        self.hwnd = 0
+        for title in self.window_titles:
+            hwnd = self.win32gui.FindWindow(None, title)
+            if hwnd:
+                self.hwnd = hwnd
+                break
+        return self.hwnd
+
+    def _capture_rect(self):
+        if self.client_rect is not None:
+            rect = self.client_rect()
+            if rect:
+                return rect
+        hwnd = self._find_window()
+        if hwnd:
+            _, _, width, height = self.win32gui.GetClientRect(hwnd)
+            left, top = self.win32gui.ClientToScreen(hwnd, (0, 0))
+            if width > 0 and height > 0:
+                return left, top, width, height
+        import win32api
+        return 0, 0, win32api.GetSystemMetrics(0), win32api.GetSystemMetrics(1)
+
+    def game_rect(self):
+        return self._capture_rect()
+
+    def _prepare(self, width, height):
+        if self._size == (width, height):
+            return
+        self.close()
+        desktop = self.win32gui.GetDesktopWindow()
+        self._src_dc = self.win32gui.GetWindowDC(desktop)
+        self._mfc_dc = self.win32ui.CreateDCFromHandle(self._src_dc)
+        self._mem_dc = self._mfc_dc.CreateCompatibleDC()
+        self._bitmap = self.win32ui.CreateBitmap()
+        self._bitmap.CreateCompatibleBitmap(self._mfc_dc, width, height)
+        self._mem_dc.SelectObject(self._bitmap)
+        self._size = (width, height)
+
+    def grab(self, region=None):
+        left, top, width, height = self._capture_rect()
+        if region:
+            # Clamp the requested screen region to the client rect
+            right, bottom = min(left + width, region[0] + region[2]), min(top + height, region[1] + region[3])
+            left, top = max(left, region[0]), max(top, region[1])
+            width, height = max(1, right - left), max(1, bottom - top)
+        self._prepare(width, height)
+        self._mem_dc.BitBlt((0, 0), (width, height), self._mfc_dc, (left, top), self.win32con.SRCCOPY)
+        bits = self._bitmap.GetBitmapBits(True)
+        bgra = np.frombuffer(bits, dtype=np.uint8).reshape(height, width, 4)
+        return np.ascontiguousarray(bgra[:, :, 2::-1]), (left, top)
+
+    def close(self):
+        if self._size is None:
+            return
+        try:
+            self._mem_dc.DeleteDC()
+            self._mfc_dc.DeleteDC()
+            self.win32gui.ReleaseDC(self.win32gui.GetDesktopWindow(), self._src_dc)
+            self.win32gui.DeleteObject(self._bitmap.GetHandle())
+        except Exception as e:
+            print(f"Error releasing capture resources: {e}")
+        self._size = None
+
+
+class ReplayCapture(CaptureBackend):
+    """Serves recorded frames instead of the screen.
+
+    source is a directory of screenshots (read in file name order, e.g. the
+    bot's debug/ folder) or a video file. Frames are assumed to start at
+    screen position (0, 0).
+    """
+    needs_window = False
+    IMAGE_PATTERNS = ("*.png", "*.PNG", "*.jpg", "*.jpeg", "*.bmp")
+
+    def __init__(self, source, loop=True):
+        self.source = source
+        self.loop = loop
+        self.index = 0
+        self.size = None
+        self.video = None
+        self.files = []
+        if os.path.isdir(source):
+            for pattern in self.IMAGE_PATTERNS:
+                self.files += glob.glob(os.path.join(source, pattern))
+            self.files = sorted(set(self.files))
+            if not self.files:
+                raise FileNotFoundError(f"No recorded frames found in {source}")
+        else:
+            self.video = cv2.VideoCapture(source)
+            if not self.video.isOpened():
+                raise FileNotFoundError(f"Could not open recording {source}")
+
+    def _next_bgr(self):
+        if self.video is not None:
+            ok, image = self.video.read()
+            if not ok and self.loop:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, image = self.video.read()
+            if not ok:
+                raise EOFError(f"Recording {self.source} exhausted")
+            return image
+        if self.index >= len(self.files):
+            if not self.loop:
+                raise EOFError(f"Recording {self.source} exhausted")
+            self.index = 0
+        image = cv2.imread(self.files[self.index], cv2.IMREAD_COLOR)
+        self.index += 1
+        return image
+
+    def grab(self, region=None):
+        image = cv2.cvtColor(self._next_bgr(), cv2.COLOR_BGR2RGB)
+        self.size = (image.shape[1], image.shape[0])
+        if region:
+            left, top, width, height = region
+            return image[top:top + height, left:left + width], (left, top)
+        return image, (0, 0)
+
+    def game_rect(self):
+        # The recording is the game's client area, sized like the last frame served
+        return (0, 0) + self.size if self.size else DEFAULT_GAME_RECT
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+
+
+_backend = None
+# Held around every backend grab, the frame buffer thread and direct grabs may share a backend
+capture_lock = threading.Lock()
+
+
+_dpi_aware = False
+
+
+def set_dpi_aware():
+    """Makes the process DPI aware, once. Without it Windows scales every rect,
+    BitBlt and SendInput coordinate on a scaled display (importing pyautogui used to do this)."""
+    global _dpi_aware
+    if _dpi_aware:
+        return
+    _dpi_aware = True
+    try:
+        import ctypes
+        user32 = ctypes.windll.user32
+    except (ImportError, AttributeError, OSError):
+        return # Not Windows
+    try:
+        if user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(-4)): # Per monitor aware v2 (Windows 10 1703+)
+            return
+    except AttributeError:
+        pass
+    user32.SetProcessDPIAware()
+
+
+def default_backend():
+    set_dpi_aware()
+    try:
+        # The window manager's cached handle gives the client rect, no FindWindow per grab
+        from game import game_window
+        return NativeCapture(client_rect=game_window.client_rect)
+    except ImportError:
+        return PyAutoGuiCapture()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = default_backend()
+    return _backend
+
+
+def game_rect():
+    return get_backend().game_rect()
+
+
+def set_backend(backend):
+    """Swaps the capture source for every later Frame.grab (e.g. a ReplayCapture)."""
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
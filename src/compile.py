@@ -15,7 +15,7 @@ GUI_APP_NAME_IN_BUILD = "main_gui_app.py" # This will be the entry point for PyI
 OUTPUT_EXE_NAME = "Fo76Bot" # PyInstaller will create a folder with this name (in --onedir mode)
 
 # Custom modules used by fo76_bot.py (must be in the same dir as this compiler script)
-CUSTOM_MODULE_FILES = ["press.py", "input.py", "readtext.py"]
+CUSTOM_MODULE_FILES = ["inputengine.py", "readtext.py", "vision.py", "capture.py", "ocr.py", "keywords.py", "game.py", "macros.py", "timing.py", "states.py"]
 
 # Data folders/files to bundle (relative to this compiler script's directory)
 DATA_TO_BUNDLE = [
@@ -0,0 +1,246 @@
+'''
+Tracking of the game process and window.
+
+ProcessMonitor finds the game's PID with one process scan and then only
+checks that the cached process is still alive. Listeners get "started" and
+"exited" events when that changes.
+
+WindowManager caches the game window handle, only runs the focus sequence
+when the game really isn't in front, and gives capture the client rect.
+
+Watchdog polls the monitor from a thread and trips a CancelToken as soon as
+the game exits, so sleeps in the middle of an input sequence raise
+GameExited instead of carrying on against a dead game.
+
+@author: NobodyKnowNothing
+'''
+import time
+import logging
+import threading
+import psutil
+import timing
+from capture import GAME_WINDOW_TITLES
+
+GAME_PROCESS_NAMES = ("Fallout76.exe", "Project76.exe", "Project76_GamePass.exe")
+SCAN_INTERVAL = 1.0 # Seconds between full process scans while the game isn't running
+WATCHDOG_INTERVAL = 0.5 # Seconds between watchdog liveness checks
+
+logger = logging.getLogger('Fo76Bot') # Window focus problems belong in fo76bot.log, unattended runs are diagnosed there
+
+
+class GameExited(BaseException):
+    """Raised by CancelToken.check/sleep once the game is gone.
+
+    BaseException (like asyncio.CancelledError) so the bot's many
+    "except Exception" blocks don't swallow it on the way out.
+    """
+
+
+class ProcessMonitor:
+    def __init__(self, names=GAME_PROCESS_NAMES):
+        self.names = names
+        self.process = None # psutil.Process of the running game
+        self.last_scan = 0
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """callback(event, pid) with event "started" or "exited"."""
+        self.listeners.append(callback)
+
+    def _publish(self, event, pid):
+        for callback in list(self.listeners):
+            try:
+                callback(event, pid)
+            except Exception as e:
+                print(f"Error in process monitor listener: {e}")
+
+    def processes(self):
+        """Full scan, every running game process."""
+        found = []
+        for proc in psutil.process_iter(['pid', 'name']):
+            try:
+                if proc.info['name'] in self.names:
+                    found.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        return found
+
+    def _alive(self):
+        # is_running also compares the creation time, so a reused PID doesn't count
+        try:
+            return self.process.is_running() and self.process.status() != psutil.STATUS_ZOMBIE
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def running(self, force_scan=False):
+        events = []
+        with self.lock:
+            if self.process is not None and not self._alive():
+                events.append(("exited", self.process.pid))
+                self.process = None
+            if self.process is None and (force_scan or time.time() - self.last_scan >= SCAN_INTERVAL):
+                self.last_scan = time.time()
+                found = self.processes()
+                if found:
+                    self.process = found[0]
+                    events.append(("started", self.process.pid))
+            alive = self.process is not None
+        for event, pid in events:
+            self._publish(event, pid)
+        return alive
+
+    @property
+    def pid(self):
+        return self.process.pid if self.running() else None
+
+
+class WindowManager:
+    def __init__(self, titles=GAME_WINDOW_TITLES):
+        self.titles = titles
+        self.hwnd = 0
+        self.win32gui = None
+        self.win32con = None
+
+    def _win32(self):
+        # Imported on first use so the module loads without pywin32 (e.g. replays)
+        if self.win32gui is None:
+            import win32gui, win32con
+            self.win32gui, self.win32con = win32gui, win32con
+        return self.win32gui
+
+    def find(self):
+        """Game window handle, 0 when it isn't open. FindWindow only runs when the cached handle died."""
+        win32gui = self._win32()
+        if self.hwnd and win32gui.IsWindow(self.hwnd):
+            return self.hwnd
+        self.hwnd = 0
+        for title in self.titles:
+            hwnd = win32gui.FindWindow(None, title)
+            if hwnd:
+                self.hwnd = hwnd
+                break
+        return self.hwnd
+
+    def is_foreground(self):
+        hwnd = self.find()
+        return bool(hwnd) and self.win32gui.GetForegroundWindow() == hwnd and not self.win32gui.IsIconic(hwnd)
+
+    def activate(self, attempts=10, retry_delay=2):
+        """Brings the game to the front. Returns at once when it already is."""
+        hwnd = self.find()
+        if not hwnd:
+            return False
+        if self.is_foreground():
+            return True
+
+        win32gui = self.win32gui
+        for attempt in range(attempts):
+            try:
+                if win32gui.IsIconic(hwnd):
+                    win32gui.ShowWindow(hwnd, self.win32con.SW_RESTORE)
+                    timing.sleep(0.2)
+
+                win32gui.SetForegroundWindow(hwnd)
+                timing.sleep(0.1)
+                if win32gui.GetForegroundWindow() == hwnd:
+                    logger.info("Switched to Fallout 76.")
+                    return True
+                if attempt < attempts - 1:
+                    logger.warning(f"SetForegroundWindow did not bring Fallout 76 to the front. Attempt {attempt + 1}/{attempts}. Retrying...")
+                    timing.sleep(retry_delay)
+            except Exception as e:
+                logger.error(f"Error on attempt {attempt + 1} to focus Fallout 76: {e}")
+                return False
+
+        foreground = win32gui.GetForegroundWindow()
+        title = win32gui.GetWindowText(foreground) if foreground else "None"
+        logger.error(f"Failed to bring Fallout 76 to foreground. Current foreground: '{title}'")
+        return False
+
+    def client_rect(self):
+        """(left, top, width, height) of the game's client area on screen, None when there's no window."""
+        hwnd = self.find()
+        if not hwnd:
+            return None
+        try:
+            _, _, width, height = self.win32gui.GetClientRect(hwnd)
+            left, top = self.win32gui.ClientToScreen(hwnd, (0, 0))
+        except Exception as e:
+            logger.error(f"Error reading game window rect: {e}")
+            return None
+        if width <= 0 or height <= 0:
+            return None
+        return left, top, width, height
+
+
+game_window = WindowManager() # Shared by testmain, readtext and the capture backend
+
+
+class CancelToken:
+    def __init__(self):
+        self.event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="cancelled"):
+        self.reason = reason
+        self.event.set()
+
+    def reset(self):
+        self.reason = None
+        self.event.clear()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def check(self):
+        if self.event.is_set():
+            raise GameExited(self.reason)
+
+    def sleep(self, seconds, label=None):
+        """timing.sleep that wakes up and raises GameExited as soon as the token is cancelled."""
+        self.check()
+        if timing.sleep(seconds, self.event, label or timing.caller(1)):
+            raise GameExited(self.reason)
+
+
+class Watchdog:
+    """Background thread cancelling token when the monitored game process exits.
+
+    Only an exit of a process the monitor has seen counts, so the game not
+    running yet (before the first launch) doesn't trip it.
+    """
+
+    def __init__(self, monitor, token, interval=WATCHDOG_INTERVAL):
+        self.monitor = monitor
+        self.token = token
+        self.interval = interval
+        self.thread = None
+        self.stop_event = threading.Event()
+        monitor.subscribe(self._on_event)
+
+    def _on_event(self, event, pid):
+        if event == "exited":
+            self.token.cancel(f"Game process {pid} exited")
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.monitor.running()
+            except Exception as e:
+                print(f"Error in game watchdog: {e}")
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return self
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="GameWatchdog", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
@@ -0,0 +1,306 @@
+'''
+Keyboard and mouse injection, replaces press.py and input.py.
+
+Every key and button gets its SendInput array built once and reused. Events
+that belong together (a chord, an extended arrow key, a click's move, down
+and up) go out in one SendInput call so nothing can be interleaved between
+them. The backend is pluggable: RecordingBackend stands in for SendInput
+where there is no user32 (e.g. testing on Linux).
+
+Cursor moves follow a MotionProfile instead of pyautogui's animated moveTo:
+INSTANT jumps straight to the target, GLIDE sends a short fixed-step path
+in the same single SendInput call and then settles briefly so the game
+registers the hover.
+
+@author: NobodyKnowNothing
+'''
+import ctypes
+import time
+import timing
+from collections import namedtuple
+
+SCAN_CODES = {
+    "ESC": 0x01, "1": 0x02, "2": 0x03, "3": 0x04, "4": 0x05, "5": 0x06, "6": 0x07, "7": 0x08, "8": 0x09, "9": 0x0A,
+    "0": 0x0B, "MINUS": 0x0C, "EQUAL": 0x0D, "BACKSPACE": 0x0E, "TAB": 0x0F, "Q": 0x10, "W": 0x11, "E": 0x12,
+    "R": 0x13, "T": 0x14, "Y": 0x15, "U": 0x16, "I": 0x17, "O": 0x18, "P": 0x19, "LEFT_BRACKET": 0x1A,
+    "RIGHT_BRACKET": 0x1B, "ENTER": 0x1C, "LEFT_CTRL": 0x1D, "A": 0x1E, "S": 0x1F, "D": 0x20, "F": 0x21, "G": 0x22,
+    "H": 0x23, "J": 0x24, "K": 0x25, "L": 0x26, "SEMICOLON": 0x27, "APOSTROPHE": 0x28, "GRAVE": 0x29,
+    "LEFT_SHIFT": 0x2A, "BACKSLASH": 0x2B, "Z": 0x2C, "X": 0x2D, "C": 0x2E, "V": 0x2F, "B": 0x30, "N": 0x31,
+    "M": 0x32, "COMMA": 0x33, "PERIOD": 0x34, "SLASH": 0x35, "RIGHT_SHIFT": 0x36, "NUM_ASTERISK": 0x37,
+    "LEFT_ALT": 0x38, "SPACE": 0x39, "CAPS_LOCK": 0x3A, "F1": 0x3B, "F2": 0x3C, "F3": 0x3D, "F4": 0x3E, "F5": 0x3F,
+    "F6": 0x40, "F7": 0x41, "F8": 0x42, "F9": 0x43, "F10": 0x44, "NUM_LOCK": 0x45, "SCROLL_LOCK": 0x46,
+    "NUM_7": 0x47, "NUM_8": 0x48, "NUM_9": 0x49, "NUM_MINUS": 0x4A, "NUM_4": 0x4B, "NUM_5": 0x4C, "NUM_6": 0x4D,
+    "NUM_PLUS": 0x4E, "NUM_1": 0x4F, "NUM_2": 0x50, "NUM_3": 0x51, "NUM_0": 0x52, "NUM_PERIOD": 0x53,
+    "F11": 0x57, "F12": 0x58,
+}
+# The 0xE0-prefixed keys, sent as their scan code with KEYEVENTF_EXTENDEDKEY
+EXTENDED_KEYS = {"UP": 0x48, "DOWN": 0x50, "LEFT": 0x4B, "RIGHT": 0x4D}
+
+# steps: absolute moves on the way to the target, all sent as one batch. settle: seconds to wait once there
+MotionProfile = namedtuple("MotionProfile", "name steps settle")
+INSTANT = MotionProfile("instant", 1, 0)
+GLIDE = MotionProfile("glide", 8, 0.05) # For buttons that only take a click after seeing the cursor arrive
+MOTION_PROFILES = {profile.name: profile for profile in (INSTANT, GLIDE)}
+
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_SCANCODE = 0x0008
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+BUTTON_FLAGS = { # button -> (down, up)
+    "LEFT": (0x0002, 0x0004),
+    "RIGHT": (0x0008, 0x0010),
+    "MIDDLE": (0x0020, 0x0040),
+}
+
+# C struct definitions, shared by every batch
+PUL = ctypes.POINTER(ctypes.c_ulong)
+
+
+class KeyBdInput(ctypes.Structure):
+    _fields_ = [("wVk", ctypes.c_ushort),
+                ("wScan", ctypes.c_ushort),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", PUL)]
+
+
+class HardwareInput(ctypes.Structure):
+    _fields_ = [("uMsg", ctypes.c_ulong),
+                ("wParamL", ctypes.c_short),
+                ("wParamH", ctypes.c_ushort)]
+
+
+class MouseInput(ctypes.Structure):
+    _fields_ = [("dx", ctypes.c_long),
+                ("dy", ctypes.c_long),
+                ("mouseData", ctypes.c_ulong),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", PUL)]
+
+
+class Input_I(ctypes.Union):
+    _fields_ = [("ki", KeyBdInput),
+                ("mi", MouseInput),
+                ("hi", HardwareInput)]
+
+
+class Input(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_ulong),
+                ("ii", Input_I)]
+
+
+# Backend-neutral events:
+#   ("key", scan_code, down, extended)
+#   ("button", "LEFT" / "RIGHT" / "MIDDLE", down)
+#   ("move", x, y)    absolute screen pixels
+#   ("move_rel", dx, dy)
+
+class InputBackend:
+    def compile(self, events):
+        """Turns a list of events into whatever send() takes, built once and reusable."""
+        return tuple(events)
+
+    def send(self, batch):
+        raise NotImplementedError
+
+    def position(self):
+        """Cursor position in screen pixels."""
+        raise NotImplementedError
+
+
+class SendInputBackend(InputBackend):
+    SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+
+    def __init__(self):
+        self.user32 = ctypes.windll.user32
+        self.extra = ctypes.c_ulong(0)
+        self.size = ctypes.sizeof(Input)
+
+    def _absolute(self, x, y):
+        # SendInput wants 0..65535 over the whole virtual desktop
+        metrics = self.user32.GetSystemMetrics
+        left, top = metrics(self.SM_XVIRTUALSCREEN), metrics(self.SM_YVIRTUALSCREEN)
+        width, height = max(2, metrics(self.SM_CXVIRTUALSCREEN)), max(2, metrics(self.SM_CYVIRTUALSCREEN))
+        return round((x - left) * 65535 / (width - 1)), round((y - top) * 65535 / (height - 1))
+
+    def _input(self, event):
+        extra = ctypes.pointer(self.extra)
+        kind = event[0]
+        if kind == "key":
+            _, scan, down, extended = event
+            flags = KEYEVENTF_SCANCODE | (0 if down else KEYEVENTF_KEYUP) | (KEYEVENTF_EXTENDEDKEY if extended else 0)
+            return Input(INPUT_KEYBOARD, Input_I(ki=KeyBdInput(0, scan, flags, 0, extra)))
+        if kind == "button":
+            _, button, down = event
+            flags = BUTTON_FLAGS[button][0 if down else 1]
+            return Input(INPUT_MOUSE, Input_I(mi=MouseInput(0, 0, 0, flags, 0, extra)))
+        if kind == "move":
+            dx, dy = self._absolute(event[1], event[2])
+            flags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+            return Input(INPUT_MOUSE, Input_I(mi=MouseInput(dx, dy, 0, flags, 0, extra)))
+        if kind == "move_rel":
+            return Input(INPUT_MOUSE, Input_I(mi=MouseInput(event[1], event[2], 0, MOUSEEVENTF_MOVE, 0, extra)))
+        raise ValueError(f"Unknown input event {event}")
+
+    def compile(self, events):
+        return (Input * len(events))(*[self._input(event) for event in events])
+
+    def send(self, batch):
+        if len(batch):
+            self.user32.SendInput(len(batch), batch, self.size)
+
+    def position(self):
+        point = (ctypes.c_long * 2)()
+        self.user32.GetCursorPos(point)
+        return point[0], point[1]
+
+
+class RecordingBackend(InputBackend):
+    """Keeps every batch instead of sending it: sent is [(time, events)]."""
+
+    def __init__(self):
+        self.sent = []
+        self.cursor = (0, 0)
+
+    def send(self, batch):
+        self.sent.append((time.time(), batch))
+        for event in batch:
+            if event[0] == "move":
+                self.cursor = (event[1], event[2])
+            elif event[0] == "move_rel":
+                self.cursor = (self.cursor[0] + event[1], self.cursor[1] + event[2])
+
+    def position(self):
+        return self.cursor
+
+    def events(self):
+        return [event for _, batch in self.sent for event in batch]
+
+
+def default_backend():
+    if hasattr(ctypes, "windll"):
+        return SendInputBackend()
+    print("Warning: SendInput not available on this platform, inputs are only recorded.")
+    return RecordingBackend()
+
+
+class InputEngine:
+    def __init__(self, backend=None, sleep=timing.sleep):
+        self.backend = backend if backend is not None else default_backend()
+        self.sleep = sleep # Waits between the halves of held keys/clicks, swap for a cancellable one (the release is still sent)
+        self.batches = {} # (kind, name, ...) -> compiled batch, kinds say key_ or button_ ("LEFT" is both)
+
+    def _cached(self, key, events):
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = self.backend.compile(events)
+        return batch
+
+    @staticmethod
+    def key_event(key, down):
+        key = key.upper()
+        if key in EXTENDED_KEYS:
+            return ("key", EXTENDED_KEYS[key], down, True)
+        return ("key", SCAN_CODES[key], down, False)
+
+    def send(self, events):
+        """Sends any list of events as one batch (not cached)."""
+        self.backend.send(self.backend.compile(list(events)))
+
+    def key_down(self, key):
+        self.backend.send(self._cached(("key_down", key.upper()), [self.key_event(key, True)]))
+
+    def key_up(self, key):
+        self.backend.send(self._cached(("key_up", key.upper()), [self.key_event(key, False)]))
+
+    def press(self, key, hold=0.1):
+        """Down, hold seconds, up. hold=0 sends both in one batch."""
+        if hold <= 0:
+            self.backend.send(self._cached(("key_tap", key.upper()), [self.key_event(key, True), self.key_event(key, False)]))
+            return
+        self.key_down(key)
+        try:
+            self.sleep(hold)
+        finally:
+            self.key_up(key) # Even when a cancellable sleep raises, a stuck key would outlive the game
+
+    def chord(self, keys, hold=0.01):
+        """All keys down in one batch, hold, then all up (reverse order) in one batch. e.g. ["LEFT_SHIFT", "SEMICOLON"]."""
+        names = tuple(key.upper() for key in keys)
+        down = self._cached(("chord_down",) + names, [self.key_event(key, True) for key in names])
+        up = self._cached(("chord_up",) + names, [self.key_event(key, False) for key in reversed(names)])
+        self.backend.send(down)
+        try:
+            if hold > 0:
+                self.sleep(hold)
+        finally:
+            self.backend.send(up)
+
+    def arrow(self, direction, hold=0.01):
+        """Extended arrow key press ("up", "down", "left", "right"), held briefly so the game registers it."""
+        self.press(direction, hold)
+
+    def type_text(self, text, wait=0.1):
+        for letter in text:
+            if letter == ' ': letter = "SPACE"
+            if letter == '.': letter = "PERIOD"
+            if letter == ':':
+                self.chord(["LEFT_SHIFT", "SEMICOLON"])
+            else:
+                self.press(letter, 0.05)
+            self.sleep(wait)
+
+    def path(self, x, y, profile=INSTANT, start=None):
+        """Move events from start (default: the cursor) to (x, y) in profile.steps even steps."""
+        if isinstance(profile, str):
+            profile = MOTION_PROFILES[profile]
+        if profile.steps <= 1:
+            return [("move", int(x), int(y))]
+        sx, sy = start if start is not None else self.position()
+        return [("move", round(sx + (x - sx) * i / profile.steps), round(sy + (y - sy) * i / profile.steps))
+                for i in range(1, profile.steps + 1)]
+
+    def move_to(self, x, y, profile=INSTANT):
+        """Moves the cursor along profile in one batch, then waits the profile's settle time."""
+        if isinstance(profile, str):
+            profile = MOTION_PROFILES[profile]
+        self.send(self.path(x, y, profile))
+        if profile.settle > 0:
+            self.sleep(profile.settle)
+
+    def move_rel(self, dx, dy):
+        self.send([("move_rel", int(dx), int(dy))])
+
+    def position(self):
+        return self.backend.position()
+
+    def click(self, x=None, y=None, button="left", hold=0, delay=0, profile=INSTANT):
+        """Optional move to (x, y), then button down/up. With hold=0 and an INSTANT move it's all one batch."""
+        button = button.upper()
+        down, up = ("button", button, True), ("button", button, False)
+        move = []
+        if x is not None and y is not None:
+            if isinstance(profile, str):
+                profile = MOTION_PROFILES[profile]
+            if profile.steps > 1 or profile.settle > 0:
+                self.move_to(x, y, profile)
+            else:
+                move = [("move", int(x), int(y))]
+        if hold <= 0:
+            if move:
+                self.send(move + [down, up])
+            else:
+                self.backend.send(self._cached(("button_click", button), [down, up]))
+        else:
+            self.send(move + [down])
+            try:
+                self.sleep(hold)
+            finally:
+                self.backend.send(self._cached(("button_up", button), [up]))
+        if delay > 0:
+            self.sleep(delay)
@@ -0,0 +1,377 @@
+'''
+Keyword spotting and classification for the small, fixed vocabulary the bot acts on.
+
+Word masks are learned from the game itself: the first time Tesseract reads a
+vocabulary word, its mask is saved (scaled to an 800px tall game) and from
+then on matching those templates against the text regions replaces the OCR
+call. Regions the templates can't fully explain still go to Tesseract.
+
+KeywordIndex turns OCR text into per-category keyword hits in one pass,
+tolerating small OCR misspellings. ui_keywords is the shared instance.
+
+@author: NobodyKnowNothing
+'''
+import os
+import json
+import threading
+from collections import deque
+import numpy as np
+import cv2
+from ocr import Word
+
+# keyword -> value per category. The first five are decisionTree's old
+# dictionaries, the rest are the phrases premainmenu, join and checkevent look for
+UI_CATEGORIES = {
+    "premain": {"press": 0, "any": 1, "button": 2, "start": 3, "continue": 4, "tab)": 5},
+    "nav": {"tab)": 0, "t)": 1, "enter)": 2, "respawn": 3, "back": 4},
+    "event": {"event": 0, "event:": 1},
+    "loading": {"loading": 4, "by...": 5, "loading.": 7, "loading..": 8, "loading...": 9},
+    "badevent": {"free": 0, "range": 1, "distinguished": 2, "guests": 3},
+    "prompt": {"press": 0, "any": 1, "button": 2, "start": 3, "continue": 4},
+    "joinfail": {"tab)": 0, "more info": 1, "t)": 2, "enter)": 3},
+    "badeventname": {"feed the people": 0, "feed": 1, "people": 2, "beasts of burden": 3, "beasts": 4,
+                     "burden": 5, "distinguished guests": 6, "distinguished": 7, "jail break": 8, "jail": 9},
+}
+
+# Categories that switch the bot's state, their keywords must be read exactly:
+# one edit away from "loading" is "leading", from "event:" is "events"
+EXACT_CATEGORIES = ("event", "loading")
+
+# Every single word in the categories, what the spotter learns templates for
+VOCABULARY = tuple(sorted({word for keywords in UI_CATEGORIES.values() for keyword in keywords for word in keyword.split()}))
+
+BASE_HEIGHT = 800 # Templates are stored as if the game were 800px tall
+SPOT_THRESHOLD = 0.8 # TM_CCOEFF_NORMED score a word match needs
+SPOT_COVERAGE = 0.9 # Share of a region's lit columns the matches must cover to skip OCR
+SPOT_MAX_VARIANTS = 3 # Templates kept per word (palettes / backgrounds differ)
+STRIP_GAP = 16 # Black columns between regions laid out for matching
+INDEX_FILENAME = "index.json"
+
+
+class KeywordSpotter:
+    def __init__(self, directory=None, vocabulary=VOCABULARY):
+        self.directory = directory
+        self.vocabulary = set(vocabulary)
+        self.templates = {} # word -> [mask at BASE_HEIGHT]
+        self.index = {} # file name -> word
+        self.scaled = {} # game height -> [(word, mask)]
+        self.lock = threading.Lock()
+
+    def load(self):
+        if not self.directory:
+            return self
+        path = os.path.join(self.directory, INDEX_FILENAME)
+        if not os.path.exists(path):
+            return self
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading keyword index, starting empty: {e}")
+            self.index = {}
+        for filename, word in self.index.items():
+            file_path = os.path.join(self.directory, filename)
+            mask = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE) if os.path.exists(file_path) else None
+            if mask is None:
+                print(f"Warning: keyword template {filename} missing")
+                continue
+            self.templates.setdefault(word, []).append(mask)
+        self.scaled.clear()
+        return self
+
+    def _save(self, word, mask):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            filename = f"word{len(self.index):03d}.png"
+            cv2.imwrite(os.path.join(self.directory, filename), mask)
+            self.index[filename] = word
+            with open(os.path.join(self.directory, INDEX_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=4)
+        except OSError as e:
+            print(f"Error saving keyword template: {e}")
+
+    def _for_height(self, game_height):
+        scaled = self.scaled.get(game_height)
+        if scaled is None:
+            scale = game_height / BASE_HEIGHT
+            scaled = []
+            for word, masks in self.templates.items():
+                for mask in masks:
+                    if abs(scale - 1) > 0.01:
+                        size = (max(1, round(mask.shape[1] * scale)), max(1, round(mask.shape[0] * scale)))
+                        mask = cv2.resize(mask, size, interpolation=cv2.INTER_AREA)
+                        mask = np.where(mask >= 128, 255, 0).astype(np.uint8)
+                    scaled.append((word, mask))
+            self.scaled[game_height] = scaled
+        return scaled
+
+    def wants(self, word):
+        # True while word is in the vocabulary and could use another template
+        return word in self.vocabulary and len(self.templates.get(word, [])) < SPOT_MAX_VARIANTS
+
+    def learn(self, mask, box, word, game_height):
+        """Stores the mask inside box (tight word box, image pixels) as a template for word."""
+        if not self.wants(word):
+            return False
+        left, top, width, height = box
+        crop = mask[top:top + height, left:left + width]
+        if crop.size == 0 or not crop.any():
+            return False
+        scale = BASE_HEIGHT / game_height
+        if abs(scale - 1) > 0.01:
+            size = (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale)))
+            crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+            crop = np.where(crop >= 128, 255, 0).astype(np.uint8)
+        with self.lock:
+            self.templates.setdefault(word, []).append(crop)
+            self.scaled.clear()
+            self._save(word, crop)
+        print(f"Learned keyword template for '{word}'")
+        return True
+
+    def spot(self, mask, boxes, game_height):
+        """Word matches per box: [([(word, x, y, width, height, score)] in x order, share of lit columns covered)].
+
+        x, y are relative to the box.
+
+        The boxes are laid side by side on one strip so each template costs a
+        single matchTemplate call however many regions there are.
+        """
+        if not boxes:
+            return []
+        strip_height = max(box[3] for box in boxes)
+        offsets, parts = [], []
+        x = 0
+        for left, top, width, height in boxes:
+            part = np.zeros((strip_height, width + STRIP_GAP), dtype=np.uint8)
+            part[:height, :width] = mask[top:top + height, left:left + width]
+            parts.append(part)
+            offsets.append(x)
+            x += part.shape[1]
+        strip = np.hstack(parts)
+        lit = strip.any(axis=0)
+
+        matches = [[] for _ in boxes]
+        for word, template in self._for_height(game_height):
+            th, tw = template.shape
+            if th > strip_height or tw > strip.shape[1]:
+                continue
+            scores = np.nan_to_num(cv2.matchTemplate(strip, template, cv2.TM_CCOEFF_NORMED), nan=0.0, posinf=0.0, neginf=0.0)
+            rows = scores.argmax(axis=0)
+            scores = scores.max(axis=0)
+            # Local maxima along x above the threshold
+            peaks = scores >= cv2.dilate(scores.reshape(1, -1), np.ones((1, tw), np.uint8)).ravel()
+            for x in np.flatnonzero(peaks & (scores >= SPOT_THRESHOLD)):
+                n = np.searchsorted(offsets, x, side='right') - 1
+                left, top, width, height = boxes[n]
+                # Whole word inside the region, and not far shorter than its text (regions are padded)
+                if x + tw > offsets[n] + width or th * 2 < height - 16:
+                    continue
+                matches[n].append((float(scores[x]), word, int(x - offsets[n]), tw, int(rows[x]), th))
+
+        results = []
+        for n, (left, top, width, height) in enumerate(boxes):
+            region_lit = lit[offsets[n]:offsets[n] + width]
+            if not region_lit.any():
+                results.append(([], 0.0))
+                continue
+            # Greedy pick, longest words first so "event:" wins over the "event" inside it
+            taken = np.zeros(width, dtype=bool)
+            found = []
+            for score, word, x, tw, y, th in sorted(matches[n], key=lambda m: (-m[3], -m[0])):
+                if taken[x:x + tw].mean() > 0.2:
+                    continue
+                taken[x:x + tw] = True
+                found.append((word, x, y, tw, th, score))
+            found.sort(key=lambda f: f[1])
+            results.append((found, (taken & region_lit).sum() / region_lit.sum()))
+        return results
+
+    def read_regions(self, mask, boxes, game_height):
+        """[ocr.Word] per box from templates alone (match score as confidence), None for boxes that still need OCR."""
+        if not self.templates:
+            return [None] * len(boxes)
+        results = []
+        for (left, top, _, _), (found, coverage) in zip(boxes, self.spot(mask, boxes, game_height)):
+            if not found or coverage < SPOT_COVERAGE:
+                results.append(None)
+                continue
+            results.append([Word(word, score * 100, left + x, top + y, tw, th, 0) for word, x, y, tw, th, score in found])
+        return results
+
+    def present(self, mask, boxes, game_height):
+        """Set of vocabulary words spotted anywhere in the boxes, full coverage or not."""
+        return {match[0] for found, _ in self.spot(mask, boxes, game_height) for match in found}
+
+
+def fuzzy_distance(keyword):
+    # OCR misreads tolerated for a keyword, short ones ("any", "t)") must be exact
+    if " " in keyword or len(keyword) < 6:
+        return 0
+    return 1 if len(keyword) < 10 else 2
+
+
+def _deletions(word, depth):
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def _edit_distance(a, b, limit):
+    # Levenshtein distance, anything past limit is reported as limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class KeywordHits:
+    """Result of KeywordIndex.classify."""
+
+    def __init__(self, hits):
+        self.hits = hits # [(category, keyword, value, whole_token)] in text order
+
+    def count(self, category):
+        # Whole-token hits only, what the old exact dictionary lookups counted
+        return sum(1 for c, _, _, whole in self.hits if c == category and whole)
+
+    def values(self, category):
+        return [value for c, _, value, whole in self.hits if c == category and whole]
+
+    def found(self, category):
+        # Any hit, including keywords inside a longer token ("event:" in "event:radiation")
+        return any(c == category for c, _, _, _ in self.hits)
+
+    def keywords(self, category):
+        return [keyword for c, keyword, _, _ in self.hits if c == category]
+
+    def __repr__(self):
+        return f"KeywordHits({self.hits})"
+
+
+class KeywordIndex:
+    """All category keywords compiled into one Aho-Corasick automaton.
+
+    classify() scans the text once for every keyword (substring hits, flagged
+    when they are a whole whitespace-separated token). Tokens nothing matched
+    exactly are then looked up in a deletion index so a single misread letter
+    in a longer word still counts, except for keywords of exact_categories.
+    """
+    FUZZY_CACHE_SIZE = 4096
+
+    def __init__(self, categories, exact_categories=EXACT_CATEGORIES):
+        self.categories = categories
+        self.targets = {} # keyword -> [(category, value)]
+        self.exact = set() # Keywords that never match fuzzily
+        for category, keywords in categories.items():
+            for keyword, value in keywords.items():
+                self.targets.setdefault(keyword.lower(), []).append((category, value))
+                if category in exact_categories:
+                    self.exact.add(keyword.lower())
+
+        # Trie as a list of {char: state}, fail links and the keywords ending at each state
+        self.goto = [{}]
+        self.output = [[]]
+        for keyword in self.targets:
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(keyword)
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.goto[state].items():
+                queue.append(target)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.goto[fallback].get(char, 0)
+                self.output[target] = self.output[target] + self.output[self.fail[target]]
+
+        # Deletion neighbourhoods of the single-word keywords that allow misreads
+        self.max_distance = 0
+        self.deletions = {} # deleted form -> {keyword}
+        for keyword in self.targets:
+            distance = self.distance(keyword)
+            self.max_distance = max(self.max_distance, distance)
+            for form in _deletions(keyword, distance):
+                self.deletions.setdefault(form, set()).add(keyword)
+        self.fuzzy_cache = {}
+
+    def distance(self, keyword):
+        return 0 if keyword in self.exact else fuzzy_distance(keyword)
+
+    def scan(self, text):
+        """[(start, end, keyword)] for every keyword occurrence in text (lowercased)."""
+        text = text.lower()
+        found = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for keyword in self.output[state]:
+                found.append((i + 1 - len(keyword), i + 1, keyword))
+        return found
+
+    def fuzzy(self, token):
+        """Closest keyword within its allowed edit distance of token, or None."""
+        if token in self.fuzzy_cache:
+            return self.fuzzy_cache[token]
+        best, best_distance = None, None
+        candidates = set()
+        for form in _deletions(token, self.max_distance):
+            candidates |= self.deletions.get(form, set())
+        for keyword in candidates:
+            limit = self.distance(keyword)
+            distance = _edit_distance(token, keyword, limit)
+            if distance <= limit and (best is None or distance < best_distance):
+                best, best_distance = keyword, distance
+        if len(self.fuzzy_cache) >= self.FUZZY_CACHE_SIZE:
+            self.fuzzy_cache.clear()
+        self.fuzzy_cache[token] = best
+        return best
+
+    def classify(self, text):
+        text = text.lower()
+        hits = []
+        exact_tokens = set()
+        for start, end, keyword in sorted(self.scan(text)):
+            whole = (start == 0 or text[start - 1].isspace()) and (end == len(text) or text[end].isspace())
+            if whole:
+                exact_tokens.add(start)
+            for category, value in self.targets[keyword]:
+                hits.append((category, keyword, value, whole))
+
+        # Tokens with no exact keyword get one fuzzy lookup each
+        position = 0
+        for token in text.split():
+            start = text.index(token, position)
+            position = start + len(token)
+            if start in exact_tokens:
+                continue
+            keyword = self.fuzzy(token)
+            if keyword is not None and keyword != token:
+                for category, value in self.targets[keyword]:
+                    hits.append((category, keyword, value, True))
+        return KeywordHits(hits)
+
+
+ui_keywords = KeywordIndex(UI_CATEGORIES)
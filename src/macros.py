@@ -0,0 +1,251 @@
+'''
+Declarative input macros for the bot's fixed navigation sequences.
+
+A macro is a list of steps (Key, Click, Move, Wait, Guard, WaitFor). It is
+compiled once into a timed schedule of input batches: events planned for
+the same moment are coalesced into one SendInput batch, and the only gaps
+added are the ones the steps ask for plus MIN_GAP between separate presses
+of the same key. MacroRunner plays a schedule against deadlines and reports
+how long each macro really took.
+
+@author: NobodyKnowNothing
+'''
+import timing
+from collections import namedtuple
+from inputengine import INSTANT, GLIDE, MOTION_PROFILES
+from vision import normalized, to_screen
+
+MIN_GAP = 0.03 # Seconds between two batches touching the same key/button, so the game sees both presses
+
+# Steps. target is a normalized (0-1) point, or the name of a point passed to MacroRunner.run
+Key = namedtuple("Key", "key hold", defaults=(0.1,))
+Click = namedtuple("Click", "target button hold", defaults=(None, "left", 0))
+Move = namedtuple("Move", "target profile", defaults=(INSTANT,)) # profile: inputengine.MotionProfile or its name
+Wait = namedtuple("Wait", "seconds")
+Guard = namedtuple("Guard", "condition") # Stop the macro unless condition() is true now
+WaitFor = namedtuple("WaitFor", "condition timeout interval", defaults=(0.5,)) # Poll until true, stop on timeout
+
+MacroResult = namedtuple("MacroResult", "name ok planned actual failed")
+
+
+class Macro:
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = list(steps)
+        self.schedule = compile_steps(self.steps)
+
+    @property
+    def planned(self):
+        """Seconds the macro takes when no WaitFor has to wait."""
+        return sum(segment[-1][0] if segment else 0 for segment in self.schedule if isinstance(segment, list))
+
+
+def _touches(events):
+    return {(e[0], e[1]) for e in events if e[0] in ("key", "button")}
+
+
+def compile_steps(steps):
+    """Turns steps into segments: lists of (offset, kind, payload) between Guard/WaitFor steps.
+
+    kind is "events" (payload: list of input events, targets unresolved;
+    ("path", target, profile) for a profiled move) or "end". Guards and WaitFors are
+    kept between segments as they are, their timing depends on the screen.
+    """
+    schedule = []
+    segment = []
+    t = 0.0
+
+    def add(at, kind, payload):
+        if kind == "events" and segment:
+            last_at, last_kind, last_payload = segment[-1]
+            # Coalesce with the previous batch when it's planned for the same moment and uses other keys
+            if last_kind == "events" and abs(last_at - at) < 1e-9 and not (_touches(last_payload) & _touches(payload)):
+                segment[-1] = (last_at, kind, last_payload + payload)
+                return at
+            if last_kind == "events" and _touches(last_payload) & _touches(payload):
+                at = max(at, last_at + MIN_GAP)
+        segment.append((at, kind, payload))
+        return at
+
+    for step in steps:
+        if isinstance(step, Key):
+            if step.hold > 0:
+                t = add(t, "events", [("key", step.key, True)])
+                t = add(t + step.hold, "events", [("key", step.key, False)])
+            else:
+                t = add(t, "events", [("key", step.key, True), ("key", step.key, False)])
+        elif isinstance(step, Click):
+            down, up = ("button", step.button, True), ("button", step.button, False)
+            move = [("move", step.target)] if step.target is not None else []
+            if step.hold > 0:
+                t = add(t, "events", move + [down])
+                t = add(t + step.hold, "events", [up])
+            else:
+                t = add(t, "events", move + [down, up])
+        elif isinstance(step, Move):
+            profile = MOTION_PROFILES[step.profile] if isinstance(step.profile, str) else step.profile
+            if profile.steps > 1:
+                t = add(t, "events", [("path", step.target, profile)])
+            else:
+                t = add(t, "events", [("move", step.target)])
+            t += profile.settle
+        elif isinstance(step, Wait):
+            t += step.seconds
+        elif isinstance(step, (Guard, WaitFor)):
+            segment.append((t, "end", None))
+            schedule.append(segment)
+            schedule.append(step)
+            segment = []
+            t = 0.0
+        else:
+            raise ValueError(f"Unknown macro step {step}")
+    segment.append((t, "end", None))
+    schedule.append(segment)
+    return schedule
+
+
+class MacroRunner:
+    """Plays compiled macros through an inputengine.InputEngine.
+
+    sleep(seconds, label=...) should be the bot's cancellable sleep.
+    """
+
+    def __init__(self, engine, sleep=timing.sleep, clock=timing.now):
+        self.engine = engine
+        self.sleep = sleep
+        self.clock = clock
+        self.stats = {} # name -> [runs, total planned, total actual]
+
+    def _point(self, target, points):
+        if isinstance(target, str):
+            return points[target]
+        return to_screen(target)
+
+    def _wait_until(self, deadline, label):
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining, label=label)
+
+    def _resolve(self, events, points):
+        resolved = []
+        cursor = None # Where the batch has put the cursor so far, paths start there
+        for event in events:
+            if event[0] == "key":
+                resolved.append(self.engine.key_event(event[1], event[2]))
+            elif event[0] == "button":
+                resolved.append(("button", event[1].upper(), event[2]))
+            else:
+                x, y = self._point(event[1], points)
+                if event[0] == "path":
+                    resolved.extend(self.engine.path(x, y, event[2], start=cursor))
+                else:
+                    resolved.append(("move", int(x), int(y)))
+                cursor = (x, y)
+        return resolved
+
+    @staticmethod
+    def _track(held, events):
+        for event in events:
+            if event[0] == "key":
+                if event[2]:
+                    held[event[:2]] = ("key", event[1], False, event[3])
+                else:
+                    held.pop(event[:2], None)
+            elif event[0] == "button":
+                if event[2]:
+                    held[event[:2]] = ("button", event[1], False)
+                else:
+                    held.pop(event[:2], None)
+
+    def run(self, macro, points=None, conditions=None):
+        """Runs macro. points: {name: (x, y) screen pixels}, conditions: {name: callable}. Returns MacroResult."""
+        points = points or {}
+        conditions = conditions or {}
+        start = self.clock()
+        planned = 0.0
+        failed = None
+        held = {} # (kind, key/button) -> release event of what's down right now
+        label = f"macro {macro.name}" # Waits are accounted per macro in timing.report()
+        try:
+            for segment in macro.schedule:
+                if isinstance(segment, Guard):
+                    if not conditions[segment.condition]():
+                        failed = segment
+                        break
+                    continue
+                if isinstance(segment, WaitFor):
+                    deadline = self.clock() + segment.timeout
+                    while not conditions[segment.condition]():
+                        if self.clock() >= deadline:
+                            failed = segment
+                            break
+                        self.sleep(segment.interval, label=label)
+                    if failed:
+                        break
+                    continue
+                base = self.clock()
+                for at, kind, payload in segment:
+                    self._wait_until(base + at, label)
+                    if kind == "events":
+                        events = self._resolve(payload, points)
+                        self.engine.send(events)
+                        self._track(held, events)
+                planned += segment[-1][0]
+        finally:
+            # A cancelled sleep (game exit) stops the macro between a down and its up, let go of everything
+            if held:
+                self.engine.send(list(held.values()))
+        actual = self.clock() - start
+        result = MacroResult(macro.name, failed is None, planned, actual, failed)
+        stats = self.stats.setdefault(macro.name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += planned
+        stats[2] += actual
+        return result
+
+    def report(self):
+        """One line per macro: runs, average planned and actual seconds."""
+        lines = []
+        for name, (runs, planned, actual) in sorted(self.stats.items()):
+            lines.append(f"{name}: {runs} runs, planned {planned / runs:.2f}s, took {actual / runs:.2f}s on average")
+        return "\n".join(lines)
+
+
+# --- The bot's sequences, tune delays here ---
+LEAVE_BUTTON = normalized(1200, 100)
+JOIN_BUTTON = normalized(175, 260)
+PERK_BUTTON = normalized(650, 460)
+
+LEAVE = Macro("leave", [
+    Key("c"), Wait(0.35),
+    Move(LEAVE_BUTTON, GLIDE), Click(LEAVE_BUTTON), Wait(0.8),
+    Key("enter"), Wait(0.25), Key("enter"),
+    WaitFor("mainmenu", timeout=7, interval=1),
+])
+
+JOIN = Macro("join", [
+    Move(JOIN_BUTTON, GLIDE), Click(JOIN_BUTTON), Wait(0.7),
+    Key("enter"), Wait(0.4), Key("enter"),
+    Wait(2), # Popups / load screen
+])
+
+DAILY_OPS = Macro("dailyops", [ # Reveals the events on the map, target: daily ops icon
+    Move("target", GLIDE), Click("target"), Wait(1.3),
+])
+
+FAST_TRAVEL = Macro("fasttravel", [ # Joins the event under target
+    Guard("map_open"),
+    Move("target", GLIDE), Click("target"), Wait(0.6),
+    Key("enter"), Wait(0.3), Key("enter"), Wait(0.5),
+])
+
+MAP_CLICK = Macro("mapclick", [ # One respawn attempt at target, instant: the respawn spiral runs this hundreds of times
+    Wait(0.05), Click("target"), Wait(0.2),
+    Key("enter", 0.05), Wait(0.2), Key("enter", 0.05), Wait(0.3),
+])
+
+PERK_SELECT = Macro("perkselect", [
+    Wait(0.3), Key("tab"), Wait(0.3),
+    Move(PERK_BUTTON, GLIDE), Click(PERK_BUTTON), Wait(0.1),
+    Key("enter"), Wait(0.1), Key("q"), Wait(0.5), Key("tab"),
+])
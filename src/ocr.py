@@ -0,0 +1,315 @@
+'''
+OCR engines used by readtext.
+
+TesserocrEngine keeps one Tesseract API instance (and the loaded "eng"
+model) alive for the whole run. PytesseractEngine is the old way, one
+tesseract.exe process per call, and is used when tesserocr isn't installed.
+
+@author: NobodyKnowNothing
+'''
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import namedtuple, OrderedDict
+import numpy as np
+
+# One recognised word, line is an id shared by the words of the same text line
+Word = namedtuple("Word", "text conf left top width height line")
+
+
+LINE_PAD = 8 # Black border around each crop, Tesseract reads poorly right at the image edge
+
+
+def _psm(config, default=6):
+    match = re.search(r"--psm\s+(\d+)", config or "")
+    return int(match.group(1)) if match else default
+
+
+def _with_psm(config, psm):
+    config = re.sub(r"--psm\s+\d+", "", config or "").strip()
+    return f"{config} --psm {psm}".strip()
+
+
+class OcrEngine:
+    name = "base"
+
+    def image_to_string(self, image, config=""):
+        """OCR of a 2D uint8 numpy array (white text on black), returns the raw text."""
+        raise NotImplementedError
+
+    def image_to_words(self, image, config=""):
+        """Same OCR but returns [Word] in reading order, with boxes in image pixels."""
+        raise NotImplementedError
+
+    def read_lines(self, image, boxes, config=""):
+        """OCR of each (left, top, width, height) box of image, returns [Word] per box.
+
+        Word boxes are in image pixels. Default packs the crops into one strip
+        (black gap between them) so it costs a single image_to_words call,
+        then splits the words by strip band.
+        """
+        if not boxes:
+            return []
+        crops = [image[top:top + height, left:left + width] for left, top, width, height in boxes]
+        strip_width = max(crop.shape[1] for crop in crops) + 2 * LINE_PAD
+        bands = []
+        parts = []
+        y = 0
+        for crop in crops:
+            band = np.zeros((crop.shape[0] + 2 * LINE_PAD, strip_width), dtype=np.uint8)
+            band[LINE_PAD:LINE_PAD + crop.shape[0], LINE_PAD:LINE_PAD + crop.shape[1]] = crop
+            parts.append(band)
+            bands.append((y, y + band.shape[0]))
+            y += band.shape[0]
+        # Several lines in one image, so always block mode here
+        words = self.image_to_words(np.vstack(parts), _with_psm(config, 6))
+        results = []
+        for (start, end), (left, top, _, _) in zip(bands, boxes):
+            results.append([w._replace(left=w.left - LINE_PAD + left, top=w.top - start - LINE_PAD + top)
+                            for w in words if start <= w.top + w.height // 2 < end])
+        return results
+
+    def close(self):
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """Spawns tesseract.exe for every call through pytesseract."""
+    name = "pytesseract"
+
+    def __init__(self, tesseract_path, lang="eng"):
+        import pytesseract
+        self.pytesseract = pytesseract
+        self.lang = lang
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+    def image_to_string(self, image, config=""):
+        return str(self.pytesseract.image_to_string(image, lang=self.lang, config=config))
+
+    def image_to_words(self, image, config=""):
+        data = self.pytesseract.image_to_data(image, lang=self.lang, config=config,
+                                              output_type=self.pytesseract.Output.DICT)
+        words = []
+        for i, text in enumerate(data["text"]):
+            if not text.strip():
+                continue
+            line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            words.append(Word(text, float(data["conf"][i]), data["left"][i], data["top"][i],
+                              data["width"][i], data["height"][i], line))
+        return words
+
+
+class TesserocrEngine(OcrEngine):
+    """In-process Tesseract through tesserocr, model loaded once and kept warm."""
+    name = "tesserocr"
+
+    def __init__(self, tesseract_path, lang="eng"):
+        import tesserocr
+        self.tesserocr = tesserocr
+        tessdata = None
+        if tesseract_path:
+            candidate = os.path.join(os.path.dirname(tesseract_path), "tessdata")
+            if os.path.isdir(candidate):
+                tessdata = candidate
+        kwargs = {"lang": lang}
+        if tessdata:
+            kwargs["path"] = tessdata
+        # Raises RuntimeError when the language data can't be loaded
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        self.lock = threading.Lock()
+
+    def _set_image(self, image, config):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        self.api.SetPageSegMode(_psm(config))
+        self.api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+    def image_to_string(self, image, config=""):
+        with self.lock:
+            self._set_image(image, config)
+            return self.api.GetUTF8Text()
+
+    def _words(self):
+        # Words of the last Recognize(), boxes are in full image pixels even with a rectangle set
+        RIL = self.tesserocr.RIL
+        self.api.Recognize()
+        words = []
+        line = -1
+        for word in self.tesserocr.iterate_level(self.api.GetIterator(), RIL.WORD):
+            if word.IsAtBeginningOf(RIL.TEXTLINE):
+                line += 1
+            text = word.GetUTF8Text(RIL.WORD)
+            box = word.BoundingBox(RIL.WORD)
+            if not text or not text.strip() or box is None:
+                continue
+            left, top, right, bottom = box
+            words.append(Word(text, word.Confidence(RIL.WORD), left, top, right - left, bottom - top, max(line, 0)))
+        return words
+
+    def image_to_words(self, image, config=""):
+        with self.lock:
+            self._set_image(image, config)
+            return self._words()
+
+    def read_lines(self, image, boxes, config=""):
+        # Image is uploaded once, then each box is recognised in place with the line mode
+        results = []
+        with self.lock:
+            self._set_image(image, config)
+            for left, top, width, height in boxes:
+                self.api.SetRectangle(left, top, width, height)
+                results.append(self._words())
+        return results
+
+    def close(self):
+        with self.lock:
+            self.api.End()
+
+
+class OcrCache:
+    """LRU of OCR results keyed on a hash of the binarized image.
+
+    The masks handed to Tesseract repeat a lot (same menu, same loading
+    screen), so identical pixels get the previous text back. size bounds the
+    number of entries and max_age (seconds, None for no limit) drops stale ones.
+    """
+
+    def __init__(self, size=64, max_age=None):
+        self.size = size
+        self.max_age = max_age
+        self.entries = OrderedDict() # key -> (time stored, result)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(kind, image, config):
+        image = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        digest.update(f"{kind}|{image.shape}|{image.dtype}|{config}".encode())
+        return digest.digest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.max_age is not None and time.time() - entry[0] > self.max_age:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = (time.time(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > max(0, self.size):
+                self.entries.popitem(last=False)
+
+    def resize(self, size, max_age=None):
+        with self.lock:
+            self.size = size
+            self.max_age = max_age
+            while len(self.entries) > max(0, size):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "hit_rate": rate}
+
+
+class CachedEngine(OcrEngine):
+    """Wraps an engine so repeated images skip Tesseract."""
+    REPORT_EVERY = 100 # Print cache stats every N lookups
+
+    def __init__(self, engine, cache):
+        self.engine = engine
+        self.cache = cache
+        self.name = f"{engine.name} (cached)"
+
+    def _lookup(self, kind, image, config, run):
+        key = self.cache.key(kind, image, config)
+        result = self.cache.get(key)
+        if result is None:
+            result = run(image, config)
+            self.cache.put(key, result)
+        stats = self.cache.stats()
+        if (stats["hits"] + stats["misses"]) % self.REPORT_EVERY == 0:
+            print(f"OCR cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['entries']} entries")
+        return result
+
+    def image_to_string(self, image, config=""):
+        return self._lookup("string", image, config, self.engine.image_to_string)
+
+    def image_to_words(self, image, config=""):
+        return list(self._lookup("words", image, config, lambda i, c: tuple(self.engine.image_to_words(i, c))))
+
+    def read_lines(self, image, boxes, config=""):
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        run = lambda i, c: tuple(tuple(words) for words in self.engine.read_lines(i, boxes, c))
+        return [list(words) for words in self._lookup(f"lines{boxes}", image, config, run)]
+
+    def close(self):
+        self.engine.close()
+
+
+class OcrResult:
+    """What readui read: the words with their confidence (0-100) and box.
+
+    .text is the lowercased string existing callers used to get, str() gives
+    the same. confident() tells a clean read from a garbled partial one.
+    """
+
+    def __init__(self, words=()):
+        self.words = list(words)
+        self.text = words_to_text(self.words).lower()
+
+    @property
+    def confidence(self):
+        # Lowest word confidence, 0 when nothing was read
+        return min((w.conf for w in self.words), default=0.0)
+
+    def confident(self, min_conf=80):
+        return bool(self.words) and self.confidence >= min_conf
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"OcrResult({self.text!r}, confidence={self.confidence:.0f})"
+
+
+def words_to_text(words):
+    """Joins words back into text, one line per Tesseract text line."""
+    lines = []
+    last_line = None
+    for word in words:
+        if lines and word.line == last_line:
+            lines[-1].append(word.text)
+        else:
+            lines.append([word.text])
+        last_line = word.line
+    return "\n".join(" ".join(line) for line in lines)
+
+
+def create_engine(tesseract_path, lang="eng"):
+    """Long-lived tesserocr engine when available, pytesseract otherwise."""
+    try:
+        return TesserocrEngine(tesseract_path, lang)
+    except ImportError:
+        print("Warning: 'tesserocr' library not found. Falling back to pytesseract (one process per OCR call).")
+    except RuntimeError as e:
+        print(f"Warning: tesserocr could not load Tesseract data ({e}). Falling back to pytesseract.")
+    return PytesseractEngine(tesseract_path, lang)
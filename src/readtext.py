@@ -1,110 +1,249 @@
-import pytesseract
-import time
-import win32con
-import win32gui
-import pyautogui
-from PIL import Image
-from press import WindowsInputSimulator
 import numpy as np
 import cv2 # Import OpenCV
+from vision import Frame, frame_burst
+import capture
+from game import game_window
+import ocr
+from keywords import KeywordSpotter
 
-inputs = WindowsInputSimulator()
 path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'  # Path to Tesseract executable
 
+_engine = None # ocr engine, created on first use and kept for the whole run
+OCR_CACHE_SIZE = 64 # Distinct masks remembered, 0 disables the cache
+OCR_CACHE_MAX_AGE = None # Seconds before a cached read is thrown away, None keeps it until evicted
+ocr_cache = ocr.OcrCache(OCR_CACHE_SIZE, OCR_CACHE_MAX_AGE)
+
 def tesseract_path_init(input_path):
-    global path
+    global path, _engine
     path = input_path
+    if _engine is not None:
+        _engine.close()
+        _engine = None
 
-def switch_to_application(window_title):
-    try:
-        hwnd = win32gui.FindWindow(None, window_title)
-        if hwnd == 0:
-            print(f"Window '{window_title}' not found")
-            return False
-        
-        # Use SW_SHOW instead of SW_RESTORE for a more reliable activation
-        win32gui.ShowWindow(hwnd, win32con.SW_SHOW)
-        win32gui.SetForegroundWindow(hwnd)
-        return True
-    except Exception as e:
-        print(f"Error occurred while switching to window: {e}")
-        return False
+keyword_spotter = None # KeywordSpotter, see keyword_spotter_init
+
+def keyword_spotter_init(directory):
+    # Word templates learned from earlier reads, lets known words skip Tesseract
+    global keyword_spotter
+    keyword_spotter = KeywordSpotter(directory).load()
+
+def ocr_cache_init(size=OCR_CACHE_SIZE, max_age=OCR_CACHE_MAX_AGE):
+    global _engine
+    ocr_cache.resize(size, max_age)
+    if _engine is not None:
+        _engine.close()
+        _engine = None
+
+def ocr_engine():
+    global _engine
+    if _engine is None:
+        _engine = ocr.create_engine(path)
+        if ocr_cache.size > 0:
+            _engine = ocr.CachedEngine(_engine, ocr_cache)
+        print(f"OCR engine: {_engine.name}")
+    return _engine
 
 def screenshot():
-    # Take a screenshot of the window
-    if switch_to_application("Fallout76"):
-        # pyautogui is fine, but consider mss for higher performance if needed
-        screenshot_img = pyautogui.screenshot(region=(0, 0, 1280, 800))
-        return screenshot_img
+    # Take a screenshot of the window (replayed recordings don't need the game focused)
+    if not capture.get_backend().needs_window or game_window.activate():
+        return Frame.grab(capture.game_rect())
     return None
 
-def readui(playing, vers):
-    global path
-    print("Reading text")
-    pytesseract.pytesseract.tesseract_cmd = path
+# playing=True keeps only pixels that held still over a short burst of frames:
+# HUD text is static, the world and animations behind it are not
+TEMPORAL_FRAMES = 4
+TEMPORAL_WINDOW = 0.3 # Seconds the burst is spread over
+STATIC_THRESHOLD = 15 # Max per-pixel spread (gray levels) still counted as static
 
-    screenshot1_pil = screenshot()
-    if screenshot1_pil is None:
-        return ""
+def game_area(frame):
+    # Only the game's client area, the frame may cover the whole screen
+    left, top, width, height = capture.game_rect()
+    left, top = max(0, left - frame.origin[0]), max(0, top - frame.origin[1])
+    return frame.crop((left, top, width, height))
 
-    # Convert PIL Image to an OpenCV/NumPy array.
-    # OpenCV uses BGR color order, so we convert from RGB.
-    frame1 = cv2.cvtColor(np.array(screenshot1_pil), cv2.COLOR_RGB2BGR)
+def static_pixels(frames):
+    # Temporal min/max over the burst, pixels whose range stays small are static
+    stack = np.stack([cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames])
+    spread = stack.max(axis=0) - stack.min(axis=0)
+    return spread < STATIC_THRESHOLD
 
-    if playing:
-        # This loop is a fixed 1.5s delay. If it's not essential, removing it is the biggest time save.
-        for _ in range(30):
-            inputs.move_mouse(10, 10)
-            time.sleep(0.05)
-        
-        screenshot2_pil = screenshot()
-        if screenshot2_pil is None:
-            return ""
-        frame2 = cv2.cvtColor(np.array(screenshot2_pil), cv2.COLOR_RGB2BGR)
-        
-        # OPTIMIZATION 1: Use NumPy/OpenCV for fast image comparison
-        # This replaces your first pixel-by-pixel loop
-        diff = cv2.absdiff(frame1, frame2)
-        # Convert difference to grayscale to create a mask
-        mask = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-        # If the difference is below a threshold, it's considered static
-        threshold = 15
-        static_mask = mask < threshold
-        
-        # Create a black image and copy only the static parts from the original frame
-        processed_image = np.zeros_like(frame1)
-        processed_image[static_mask] = frame1[static_mask]
+# Text colour ranges for readui's vers argument (OpenCV uses BGR, so the order is (Blue, Green, Red))
+PALETTES = {
+    0: (np.array([0, 130, 130]), np.array([100, 255, 255])),
+    1: (np.array([100, 130, 130]), np.array([203, 255, 255])),
+}
+PALETTE_GAP = 32 # Black rows between stacked palette masks so Tesseract never joins their lines
+
+def ui_image(playing, frame=None):
+    # BGR image of the game area, masked to static pixels when playing
+    if frame is not None:
+        frame1 = game_area(frame).bgr
     else:
-        processed_image = frame1
+        screenshot1 = screenshot()
+        if screenshot1 is None:
+            return None
+
+        # OpenCV uses BGR color order
+        frame1 = screenshot1.bgr
+
+    if not playing:
+        return frame1
+
+    # Replaces the old 1.5s mouse wiggle + second screenshot, no input is sent
+    burst = [game_area(f).bgr for f in frame_burst(TEMPORAL_FRAMES, TEMPORAL_WINDOW)]
+    burst = [f for f in burst if f.shape == frame1.shape]
+    static_mask = static_pixels([frame1] + burst)
 
+    # Create a black image and copy only the static parts from the original frame
+    processed_image = np.zeros_like(frame1)
+    processed_image[static_mask] = frame1[static_mask]
+    return processed_image
+
+def palette_mask(image, vers):
     # OPTIMIZATION 2: Use cv2.inRange for ultra-fast color filtering
-    # This replaces your second and third pixel-by-pixel loops
-    if vers == 0:
-        # Note: OpenCV uses BGR, so the order is (Blue, Green, Red)
-        yellow_lower = np.array([0, 130, 130])
-        yellow_upper = np.array([100, 255, 255])
-    elif vers == 1:
-        yellow_lower = np.array([100, 130, 130])
-        yellow_upper = np.array([203, 255, 255])
-
-    # Create a mask containing only the pixels within the yellow range
-    yellow_mask = cv2.inRange(processed_image, yellow_lower, yellow_upper)
-    
-    # Create a final black image. Pixels that were yellow will be turned white.
-    final_image = np.zeros_like(yellow_mask)
-    final_image[yellow_mask > 0] = 255 # Make yellow pixels white
-
-    # OPTIMIZATION 3: Configure Tesseract for better performance
-    # --psm 6: Assume a single uniform block of text.
-    # --psm 7: Treat the image as a single text line.
-    # Experiment to see which works best for your use case.
-    custom_config = r'--oem 3 --psm 6'
-    
+    # Pixels within the palette's range come out white (255), everything else black
+    lower, upper = PALETTES[vers]
+    return cv2.inRange(image, lower, upper)
+
+# Text region detection on a palette mask, sizes are for an 800px tall game and scale with it
+TEXT_JOIN = (15, 3) # Dilation kernel (width, height) that joins the letters and words of one line
+TEXT_MIN_HEIGHT = 8 # Joined blob height range that can be a line of UI text
+TEXT_MAX_HEIGHT = 60
+TEXT_MIN_PIXELS = 20 # Lit mask pixels a region needs, drops specks
+TEXT_MAX_REGIONS = 40 # Keep the regions with the most lit pixels past this
+TEXT_PAD = 4
+
+def text_regions(mask, game_height=None):
+    # [(left, top, width, height), line] of likely text in reading order,
+    # the same line number means the regions sit side by side on one line.
+    # game_height: height the sizes scale with when mask isn't one game-sized image (e.g. stacked palettes)
+    scale = (game_height or mask.shape[0]) / 800
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, round(TEXT_JOIN[0] * scale)), max(1, round(TEXT_JOIN[1] * scale))))
+    joined = cv2.dilate(mask, kernel)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+    if count <= 1:
+        return []
+    lit = np.bincount(labels[mask > 0], minlength=count)
+    left, top, width, height = (stats[1:, i] for i in range(4))
+    keep = ((height >= TEXT_MIN_HEIGHT * scale) & (height <= TEXT_MAX_HEIGHT * scale)
+            & (width * 2 >= height) & (lit[1:] >= TEXT_MIN_PIXELS * scale * scale))
+    index = np.flatnonzero(keep)
+    index = index[np.argsort(-lit[1:][index])][:TEXT_MAX_REGIONS]
+
+    boxes = []
+    for i in index:
+        x0, y0 = max(0, left[i] - TEXT_PAD), max(0, top[i] - TEXT_PAD)
+        x1, y1 = min(mask.shape[1], left[i] + width[i] + TEXT_PAD), min(mask.shape[0], top[i] + height[i] + TEXT_PAD)
+        boxes.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+
+    # Reading order: top to bottom, a box whose centre falls inside the current line joins it
+    boxes.sort(key=lambda b: b[1] + b[3] / 2)
+    regions = []
+    line, line_bottom = -1, -1
+    for box in boxes:
+        if box[1] + box[3] / 2 > line_bottom:
+            line += 1
+            line_bottom = box[1] + box[3]
+        regions.append((box, line))
+    regions.sort(key=lambda r: (r[1], r[0][0]))
+    return regions
+
+def merge_words(regions, words):
+    # Words of every region in reading order, tagged with the region's line so
+    # regions side by side come out space separated and lines newline separated
+    merged = []
+    for (box, line), region_words in zip(regions, words):
+        merged.extend(w._replace(line=line) for w in region_words)
+    return merged
+
+# OPTIMIZATION 3: Only the text regions go through Tesseract, one line each
+# --psm 6: Assume a single uniform block of text.
+# --psm 7: Treat the image as a single text line.
+LINE_CONFIG = r'--oem 3 --psm 7'
+
+# Lowest word confidence (0-100) for a read to be trusted without a second look
+CONFIDENT_READ = 80
+
+def learn_keywords(mask, words, game_height):
+    # Words Tesseract had to read: keep the mask of any vocabulary word we have no (or few) templates for.
+    # Only clean reads, a garbled one would become a template later reads trust without Tesseract
+    for word in words:
+        if word.conf < CONFIDENT_READ:
+            continue
+        token = word.text.lower().strip()
+        if keyword_spotter.wants(token):
+            keyword_spotter.learn(mask, (word.left, word.top, word.width, word.height), token, game_height)
+
+def read_regions(mask, regions, game_height):
+    # [ocr.Word] of each region: keyword templates first, Tesseract for whatever they can't explain
+    boxes = [box for box, _ in regions]
+    if keyword_spotter is not None:
+        words = keyword_spotter.read_regions(mask, boxes, game_height)
+    else:
+        words = [None] * len(boxes)
+    missing = [n for n, found in enumerate(words) if found is None]
+    if not missing:
+        return words
+    lines = ocr_engine().read_lines(mask, [boxes[n] for n in missing], LINE_CONFIG)
+    for n, line in zip(missing, lines):
+        words[n] = line
+        if keyword_spotter is not None:
+            learn_keywords(mask, line, game_height)
+    return words
+
+def readui_result(playing, vers, frame=None):
+    # Like readui but returns the ocr.OcrResult (per-word text, confidence and box)
+    print("Reading text")
+    processed_image = ui_image(playing, frame)
+    if processed_image is None:
+        return ocr.OcrResult()
+
+    final_image = palette_mask(processed_image, vers)
+    regions = text_regions(final_image)
+    if not regions:
+        return ocr.OcrResult()
+
     try:
-        # Perform OCR directly on the NumPy array (Pillow conversion is handled by pytesseract)
-        text = str(pytesseract.image_to_string(final_image, lang="eng", config=custom_config))
+        # Perform OCR directly on the NumPy array, the engine keeps Tesseract loaded between calls
+        words = read_regions(final_image, regions, final_image.shape[0])
     except Exception as e:
         print(f"Error during OCR: {e}")
-        text = ""
+        return ocr.OcrResult()
         
-    return text.lower()
\ No newline at end of file
+    return ocr.OcrResult(merge_words(regions, words))
+
+def readui(playing, vers, frame=None):
+    # frame: optional vision.Frame already captured this tick, reused instead of a new screenshot
+    return readui_result(playing, vers, frame).text
+
+def readui_palettes(playing, versions=(1, 0), frame=None):
+    # One capture and (at most) one OCR call for several palettes: the masks are stacked
+    # vertically and each text region is given back to the palette whose band it sits in.
+    # Returns {vers: ocr.OcrResult}
+    print("Reading text")
+    results = {vers: ocr.OcrResult() for vers in versions}
+    processed_image = ui_image(playing, frame)
+    if processed_image is None:
+        return results
+
+    masks = [palette_mask(processed_image, vers) for vers in versions]
+    height, width = masks[0].shape
+    gap = np.zeros((PALETTE_GAP, width), dtype=np.uint8)
+    stacked = np.vstack([part for mask in masks for part in (mask, gap)][:-1])
+    regions = text_regions(stacked, height)
+    if not regions:
+        return results
+
+    try:
+        words = read_regions(stacked, regions, height)
+    except Exception as e:
+        print(f"Error during OCR: {e}")
+        return results
+
+    band = height + PALETTE_GAP
+    for i, vers in enumerate(versions):
+        mine = [n for n, (box, _) in enumerate(regions) if i * band <= box[1] + box[3] // 2 < i * band + height]
+        merged = merge_words([regions[n] for n in mine], [words[n] for n in mine])
+        # Word boxes back to game area pixels
+        results[vers] = ocr.OcrResult(w._replace(top=w.top - i * band) for w in merged)
+    return results
@@ -0,0 +1,148 @@
+'''
+Screen state machine for the bot's main loop, replaces decisionTree's
+match over a 7-tuple of icon booleans.
+
+The bot is always in one named state. Every transition out of a state names
+the detector that confirms it, and a tick only runs the detectors of the
+current state's transitions, in table order, until one confirms. So a
+loading screen only looks for what can follow a loading screen instead of
+every icon plus two OCR passes. UNKNOWN has a transition to every state: it
+is where the machine starts, and where it falls back to when a state
+outlives its timeout.
+
+Detectors are callables(frame) -> bool passed in by name, like the
+conditions of macros.MacroRunner. Their results are kept for the tick, so a
+handler asking again costs nothing.
+
+@author: NobodyKnowNothing
+'''
+import logging
+import timing
+from collections import namedtuple
+
+UNKNOWN = "unknown"
+PREMAIN = "premain"
+MAIN_MENU = "main menu"
+LOADING = "loading"
+IN_WORLD = "in world"
+MAP_OPEN = "map open"
+DEAD = "dead"
+IN_EVENT = "in event"
+POPUP = "popup" # An 'OK' dialog over any of the others
+
+Transition = namedtuple("Transition", "source target detector")
+
+logger = logging.getLogger('Fo76Bot')
+
+# Seconds a state may last without a transition before it is re-detected from scratch
+STATE_TIMEOUTS = {PREMAIN: 60, LOADING: 120, POPUP: 10}
+
+
+class StateMachine:
+    def __init__(self, transitions, detectors, timeouts=STATE_TIMEOUTS, clock=timing.now):
+        self.transitions = {} # source -> [Transition], in priority order
+        for transition in transitions:
+            if transition.detector not in detectors:
+                raise ValueError(f"No detector '{transition.detector}' for {transition}")
+            self.transitions.setdefault(transition.source, []).append(transition)
+        self.detectors = detectors
+        self.timeouts = timeouts
+        self.clock = clock
+        self.state = UNKNOWN
+        self.previous = UNKNOWN
+        self.entered = clock()
+        self.frame = None
+        self.results = {} # detector -> result, this tick only
+        self.stats = {} # detector -> [runs, seconds]
+
+    @property
+    def elapsed(self):
+        """Seconds since the current state was entered."""
+        return self.clock() - self.entered
+
+    def enter(self, state):
+        """Moves to state without a detector, for an action's known outcome (e.g. join -> LOADING)."""
+        if state != self.state:
+            self.previous, self.state = self.state, state
+            self.entered = self.clock()
+
+    def detect(self, name):
+        """Runs detector name on the tick's frame, once per tick."""
+        if name not in self.results:
+            start = self.clock()
+            try:
+                result = bool(self.detectors[name](self.frame))
+            except Exception:
+                logger.exception(f"Error in detector '{name}', counting it as not detected:")
+                result = False
+            self.results[name] = result
+            stats = self.stats.setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += self.clock() - start
+        return self.results[name]
+
+    def update(self, frame):
+        """Starts a tick on frame and follows the first confirmed transition. Returns it, or None."""
+        self.frame = frame
+        self.results = {}
+        timeout = self.timeouts.get(self.state)
+        if timeout is not None and self.elapsed > timeout:
+            logger.warning(f"No transition out of '{self.state}' for {timeout}s, re-detecting.")
+            self.enter(UNKNOWN)
+        for transition in self.transitions.get(self.state, ()):
+            if self.detect(transition.detector):
+                self.enter(transition.target)
+                return transition
+        return None
+
+    def report(self):
+        """One line per detector: runs and average cost."""
+        lines = []
+        for name, (runs, seconds) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name}: {runs} runs, {seconds / runs * 1000:.1f} ms on average")
+        return "\n".join(lines)
+
+
+# --- The bot's transitions. Earlier rows win, so blocking screens are checked first ---
+BOT_TRANSITIONS = [
+    *[Transition(state, POPUP, "ok") for state in (UNKNOWN, MAIN_MENU, LOADING, IN_WORLD, MAP_OPEN, IN_EVENT)],
+
+    Transition(UNKNOWN, MAIN_MENU, "menu"),
+    Transition(UNKNOWN, DEAD, "respawn"),
+    Transition(UNKNOWN, MAP_OPEN, "map"),
+    Transition(UNKNOWN, LOADING, "loading_text"),
+    Transition(UNKNOWN, PREMAIN, "premain_text"),
+    Transition(UNKNOWN, IN_EVENT, "event_text"),
+    Transition(UNKNOWN, IN_WORLD, "hud"),
+
+    Transition(PREMAIN, MAIN_MENU, "menu"),
+    Transition(PREMAIN, LOADING, "loading_text"),
+
+    Transition(MAIN_MENU, LOADING, "menu_gone"),
+
+    Transition(LOADING, MAIN_MENU, "menu"), # Join failed or kicked back
+    Transition(LOADING, DEAD, "respawn"),
+    Transition(LOADING, MAP_OPEN, "map"),
+    Transition(LOADING, IN_EVENT, "event_text"),
+    Transition(LOADING, IN_WORLD, "hud"),
+
+    Transition(IN_WORLD, MAIN_MENU, "menu"),
+    Transition(IN_WORLD, DEAD, "respawn"),
+    Transition(IN_WORLD, MAP_OPEN, "map"),
+    Transition(IN_WORLD, IN_EVENT, "event_text"),
+    Transition(IN_WORLD, LOADING, "loading_text"),
+
+    Transition(MAP_OPEN, MAIN_MENU, "menu"),
+    Transition(MAP_OPEN, DEAD, "respawn"),
+    Transition(MAP_OPEN, IN_WORLD, "map_gone"),
+
+    Transition(DEAD, MAP_OPEN, "map"),
+    Transition(DEAD, LOADING, "loading_text"),
+    Transition(DEAD, IN_WORLD, "hud"),
+
+    Transition(IN_EVENT, MAIN_MENU, "menu"),
+    Transition(IN_EVENT, DEAD, "respawn"),
+    Transition(IN_EVENT, MAP_OPEN, "map"),
+    Transition(IN_EVENT, LOADING, "loading_text"),
+    Transition(IN_EVENT, IN_WORLD, "event_over"),
+]
@@ -1,14 +1,18 @@
 import psutil
 import subprocess
-import time
-import win32con
-import win32gui
-from press import WindowsInputSimulator
-from input import click
+import timing
+from inputengine import InputEngine, GLIDE
+from macros import MacroRunner, LEAVE, JOIN, DAILY_OPS, FAST_TRAVEL, MAP_CLICK, PERK_SELECT
 import datetime
-import pyautogui
+import cv2
 import os
-from readtext import readui, tesseract_path_init
+from readtext import readui, readui_result, readui_palettes, tesseract_path_init, keyword_spotter_init, CONFIDENT_READ
+from keywords import ui_keywords
+from states import StateMachine, BOT_TRANSITIONS, UNKNOWN, PREMAIN, MAIN_MENU, LOADING, IN_WORLD, MAP_OPEN, DEAD, IN_EVENT, POPUP
+import ocr
+from game import ProcessMonitor, CancelToken, Watchdog, GameExited, game_window
+import capture
+from vision import Frame, TemplateRegistry, RoiIndex, ChangeDetector, EventMarkerDetector, frame_buffer, match_icons, normalized, to_screen
 import sys
 import os
 
@@ -31,6 +35,14 @@ import os
 
 # --- Constants ---
 LOG_FILENAME = 'fo76bot.log'
+ROI_FILENAME = 'roi_index.json'
+KEYWORD_DIR = 'keywords' # Word templates learned from OCR reads, see keywords.py
+TIMING_REPORT_TICKS = 100 # Main loop ticks between wait time reports, see timing.py
+IN_WORLD_GRACE = 10 # Seconds loaded in without event text before looking for an event
+EVENT_OVER_GRACE = 30 # Seconds of unsure reads without event text before an event counts as over
+PREMAIN_WAIT = 5 # Seconds after pressing through the pre main menu before pressing again
+FRAME_BUFFER_RATE = 10 # Background captures per second
+FRAME_BUFFER_SIZE = 30 # Frames kept in the ring buffer
 
 
 # --- Application Logger (Fo76Bot) ---
@@ -67,42 +79,63 @@ if __name__ == '__main__':
 
 falloutpath = None
 
-inputs = WindowsInputSimulator()
+game_process = ProcessMonitor() # Cached game PID, see fo76running
+cancel_token = CancelToken() # Tripped by the watchdog when the game exits, see sleep()
+watchdog = Watchdog(game_process, cancel_token)
+inputs = InputEngine(sleep=cancel_token.sleep) # Keyboard/mouse, held keys wait on the cancel token too
+macro_runner = MacroRunner(inputs, sleep=cancel_token.sleep)
+templates = TemplateRegistry(resource_path) # Icons are decoded once, see main()
+roi_index = RoiIndex(ROI_FILENAME) # Where each icon was found before, searched first
+screen_changes = ChangeDetector() # Lets decisionTree reuse the last detections on a static screen
+event_markers = EventMarkerDetector() # Colour based, calibrated from the event icons in main()
+tickFrame = None # Frame the cached detections below were made on
+tickIcons = {} # icon name -> positions
+tickText = None # (keyword hits, OcrResult)
+lastEventText = 0 # timing.now() of the last read with event text, see event_over
+premainPressed = float("-inf") # timing.now() of the last press through the pre main menu
+
+# Click targets (LEAVE_BUTTON, JOIN_BUTTON, PERK_BUTTON) and the sequences using them live in macros.py
 leavefail = 0
 lastss = datetime.datetime.now()
 numofevents = 0
 
 def print_mouse_position():
-    position = pyautogui.position()
+    position = inputs.position()
     logger.debug(f"Mouse position: {position}")
 
 
 def mposcheck():  # Testing
     for _ in range(10):
         print_mouse_position()
-        time.sleep(1)
+        timing.sleep(1)
 
 
 def close_exe():
     killed_by_psutil = False
-    for proc in psutil.process_iter(['pid', 'name']):
-        if proc.info['name'] in ["Fallout76.exe", "Project76.exe", "Project76_GamePass.exe"]:
-            try:
-                proc.kill()
-                killed_by_psutil = True
-                logger.info("Fallout76.exe process killed via psutil.")
-            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                logger.warning(f"Could not kill Fallout76.exe with psutil: {e}")
-                pass
+    for proc in game_process.processes():
+        try:
+            proc.kill()
+            killed_by_psutil = True
+            logger.info("Fallout76.exe process killed via psutil.")
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.warning(f"Could not kill Fallout76.exe with psutil: {e}")
+            pass
 
     if killed_by_psutil:
-        time.sleep(5)
-
-    while fo76running():
-        logger.info("Fallout76.exe still running, attempting taskkill.")
-        subprocess.call(["taskkill", "/f", "/im", "Fallout76.exe"])
-        time.sleep(2)
+        timing.sleep(5)
+
+    # Full scans, not the cached PID: any leftover game process would make open_exe start a second instance
+    remaining = game_process.processes()
+    while remaining:
+        for name in sorted({proc.info['name'] for proc in remaining}):
+            logger.info(f"{name} still running, attempting taskkill.")
+            subprocess.call(["taskkill", "/f", "/im", name])
+        timing.sleep(2)
+        remaining = game_process.processes()
+    game_process.running(force_scan=True) # Drops the cached PID of the killed game
     logger.info("Fallout76.exe process closed.")
+    state_machine.enter(UNKNOWN) # Whatever screen the bot was on is gone
+    cancel_token.reset() # Our own kill isn't a crash, and a crash has been dealt with now
 
 
 def open_exe():
@@ -117,7 +150,7 @@ def open_exe():
         
         wait_tries = 0
         while not fo76running() and wait_tries < 6:
-            time.sleep(10)
+            timing.sleep(10)
             wait_tries += 1
         
         if not fo76running():
@@ -131,7 +164,7 @@ def open_exe():
                 success = True
                 break
             logger.warning(f"Failed to switch window, attempt {switch_tries + 1}. Retrying in 5s.")
-            time.sleep(5)
+            timing.sleep(5)
             switch_tries += 1
         if not success:
             logger.error("Failed to switch to Fallout76 window after multiple tries.")
@@ -145,82 +178,76 @@ def open_exe():
     return success
 
 def switch_to_application(open_if_not_found=True):
-    hwnd = win32gui.FindWindow(None, 'Fallout76')
-    if hwnd == 0:
-        hwnd = win32gui.FindWindow(None, 'Project76')
-        if hwnd == 0:
-            logger.warning(f"Window of Fallout76 not found.")
-            if open_if_not_found: time.sleep(5)
-            return open_exe() if open_if_not_found else False
-
-    max_attempts = 10
-    for attempt in range(max_attempts):
-        try:
-            if win32gui.IsIconic(hwnd):
-                win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-                time.sleep(0.2)
-
-            win32gui.SetForegroundWindow(hwnd)
-            time.sleep(0.1) 
-            if win32gui.GetForegroundWindow() == hwnd:
-                logger.info(f"Successfully switched to Fallout 76.")
-                return True
-            else:
-                if attempt < max_attempts - 1:
-                    logger.warning(f"SetForegroundWindow for Fallout 76 did not result in foreground. Attempt {attempt + 1}/{max_attempts}. Retrying...")
-                    time.sleep(2)
-                else:
-                     current_fg_window_hwnd = win32gui.GetForegroundWindow()
-                     current_fg_window_title = win32gui.GetWindowText(current_fg_window_hwnd) if current_fg_window_hwnd else "None"
-                     logger.error(f"Failed to bring Fallout 76 to foreground. Current foreground: '{current_fg_window_title}'")
+    # Fast path: cached window handle that already has focus, nothing to do
+    if game_window.find() == 0:
+        logger.warning(f"Window of Fallout76 not found.")
+        if open_if_not_found: timing.sleep(5)
+        return open_exe() if open_if_not_found else False
 
-
-        except Exception as e:
-            logger.error(f"Unexpected error on attempt {attempt + 1} for Fallout 76: {e}")
-            return False 
-            
-    logger.error(f"Could not set window Fallout 76 to foreground after {max_attempts} attempts.")
+    if game_window.activate():
+        return True
+    logger.error(f"Could not set window Fallout 76 to foreground.")
     return False
 
 
+def on_game_process(event, pid):
+    # ProcessMonitor events
+    if event == "started":
+        logger.info(f"Fallout76 process found (PID {pid}).")
+    else:
+        logger.warning(f"Fallout76 process (PID {pid}) exited.")
+
+
+def sleep(seconds):
+    # Every wait inside an action goes through here so a game exit aborts it (raises GameExited)
+    cancel_token.sleep(seconds, label=timing.caller(1))
+
+
 def fo76running(retry=False, retrycount=3): # mr google be stealing all the researcher data from there ide and google colab
-    for i in range(retrycount):
-        for process in psutil.process_iter(['pid', 'name']):
-            try:
-                if process.info['name'] in ["Fallout76.exe", "Project76.exe", "Project76_GamePass.exe"]:
-                    return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        if retry: time.sleep(5)
+    # Cheap liveness check of the cached game PID, a process scan only happens once it's gone
+    for i in range(retrycount if retry else 1):
+        if game_process.running(force_scan=retry):
+            return True
+        if retry: timing.sleep(5)
     return False
 
 
-def find_icon_positions(icon_image):
+def run_macro(macro, points=None, conditions=None):
+    # Plays one of the macros.py sequences and logs how long it really took
+    result = macro_runner.run(macro, points, conditions)
+    logger.info(f"Macro '{result.name}': planned {result.planned:.2f}s, took {result.actual:.2f}s" + ("" if result.ok else f", stopped at {result.failed}"))
+    return result.ok
+
+
+def find_icon_positions(icon_name, frame=None):
+    # icon_name: logical name from vision.ICON_SPECS, all of its variants are searched
+    # frame: optional vision.Frame to search instead of grabbing a new screenshot
     try:
-        icon_image = resource_path(icon_image)
-        icon_locations = list(pyautogui.locateAllOnScreen(icon_image, confidence=0.9))
-        if icon_locations:
-            icon_positions = []
-            for icon_location in icon_locations:
-                icon_x, icon_y = pyautogui.center(icon_location)
-                icon_positions.append((icon_x, icon_y))
-            return icon_positions
-        else:
-            return [] # Return empty list instead of False for consistency
-    except pyautogui.PyAutoGUIException as e:
-        logger.error(f"PyAutoGUI error in find_icon_positions for {icon_image}: {e}")
+        variants = templates.get(icon_name)
+        if not variants:
+            logger.error(f"No icon templates loaded for '{icon_name}'")
+            return []
+        if frame is None:
+            frame = Frame.grab()
+        return match_icons(frame, [icon_name], templates, roi_index)[icon_name] # Empty list instead of False for consistency
+    except Exception as e:
+        logger.error(f"Unexpected error in find_icon_positions for {icon_name}: {e}")
         return []
-    except Exception as e: # Catch other unexpected errors, e.g., image file not found by pyautogui
-        logger.error(f"Unexpected error in find_icon_positions for {icon_image}: {e}")
-        if not os.path.exists(icon_image):
-            logger.error(f"Icon image file not found: {icon_image}")
+
+
+def find_event_markers(frame=None):
+    # All public event markers on the map, in one colour segmentation pass
+    try:
+        if frame is None:
+            frame = Frame.grab()
+        return event_markers.detect(frame, templates.get("event", frame.game_size)) # Colour candidates confirmed by the event icons
+    except Exception as e:
+        logger.error(f"Unexpected error in find_event_markers: {e}")
         return []
 
 
 def press_left_mouse():
-    pyautogui.mouseDown()
-    time.sleep(0.1)
-    pyautogui.mouseUp()
+    inputs.click(hold=0.1)
 
 def debugscreenshot():
     global lastss
@@ -236,10 +263,10 @@ def debugscreenshot():
         if not os.path.exists(directory):
             os.makedirs(directory)
         
-        screenshot = pyautogui.screenshot()
+        screenshot = Frame.grab()
         filename = f'screenshot_{current_datetime.strftime("%Y-%m-%d_%H-%M-%S")}.png'
-        screenshot_path_val = os.path.join(directory, filename)
-        screenshot.save(screenshot_path_val)
+        screenshot_path_val = os.path.join(directory, filename) # Replayable with capture.ReplayCapture('debug')
+        cv2.imwrite(screenshot_path_val, screenshot.bgr)
         logger.info(f"Screenshot saved to {screenshot_path_val}")
         lastss = current_datetime
         
@@ -251,30 +278,32 @@ def debugscreenshot():
     return "" # Original function returned empty string
 
 
-def closemap():
-    time.sleep(0.3)
-    scoreicon = 'icons/scoreicon.png'
-    dailyops = 'icons/tester.png'
+def closemap(frame=None):
+    if frame is None:
+        sleep(0.3)
+        frame = Frame.grab()
+    scoreicon = 'score'
 
-    scorepos_list = find_icon_positions(scoreicon)
-    opspos_list = find_icon_positions(dailyops) + find_icon_positions('icons/tester1.png') + find_icon_positions('icons/tester2.png')
+    scorepos_list = find_icon_positions(scoreicon, frame)
+    opspos_list = find_icon_positions('dailyops', frame)
 
     if scorepos_list and opspos_list:
         logger.info("Map identified as open, attempting to close.")
         max_tries = 4
         for tries_count in range(max_tries):
             inputs.press("m", 0.1)
-            time.sleep(2)
+            sleep(2)
             
-            current_scorepos_list = find_icon_positions(scoreicon)
-            current_opspos_list = find_icon_positions(dailyops) + find_icon_positions('icons/tester1.png')
+            frame = Frame.grab()
+            current_scorepos_list = find_icon_positions(scoreicon, frame)
+            current_opspos_list = find_icon_positions('dailyops', frame)
             
             if not (current_scorepos_list and current_opspos_list):
                 logger.info("Map closed successfully.")
                 return True
             else:
                 inputs.press("tab", 0.1)
-                time.sleep(1)
+                sleep(1)
             if tries_count == max_tries - 1:
                 logger.warning(f"Couldn't close map after {max_tries} tries.")
                 return False
@@ -305,32 +334,31 @@ def premainmenu():
         uitext = readui(False, 1).lower()
         logger.debug(f"Pre-main menu check, UI text: '{uitext[:100]}...'")
         
-        keywords = ["press", "any", "button", "start", "continue"]
-        found_keyword = any(word in uitext for word in keywords)
+        found_keyword = ui_keywords.classify(uitext).found("prompt")
         
         if found_keyword:
             logger.info("Found pre-main menu ('press any key' screen).")
             inputs.press("tab", 0.1)
-            time.sleep(6)
+            sleep(6)
             if ismainmenu():
                 logger.info("Successfully navigated past pre-main menu to main menu.")
                 return True
             else:
                 logger.info("Pressed key on pre-main menu, but main menu not detected yet.")
         
-        time.sleep(1)
+        sleep(1)
 
     logger.warning("Pre-main menu ('press any key' screen) not found or navigation failed.")
     return False
 
-def openmap():
-    scoreicon = 'icons/scoreicon.png'
-    dailyops = 'icons/tester.png'
+def openmap(frame=None):
+    scoreicon = 'score'
     max_failcount = 1
-    okcheck()
+    if okcheck(frame) or frame is None:
+        frame = Frame.grab() # Screen changed (or nothing captured yet)
     for fail_attempt in range(max_failcount):
-        scorepos_list = find_icon_positions(scoreicon)
-        opspos_list = find_icon_positions('icons/tester.png') + find_icon_positions('icons/tester1.png') + find_icon_positions('icons/tester2.png')
+        scorepos_list = find_icon_positions(scoreicon, frame)
+        opspos_list = find_icon_positions('dailyops', frame)
 
 
         if scorepos_list and opspos_list:
@@ -339,10 +367,11 @@ def openmap():
             return True
 
         inputs.press("m", 0.1)
-        time.sleep(3)
+        sleep(3)
 
-        scorepos_list_after_press = find_icon_positions(scoreicon)
-        opspos_list_after_press = find_icon_positions(dailyops) + find_icon_positions('icons/tester1.png') + find_icon_positions('icons/tester2.png')
+        frame = Frame.grab()
+        scorepos_list_after_press = find_icon_positions(scoreicon, frame)
+        opspos_list_after_press = find_icon_positions('dailyops', frame)
 
         if scorepos_list_after_press and opspos_list_after_press:
             logger.info("Map opened successfully.")
@@ -357,7 +386,7 @@ def openmap():
         
         
         # logger.warning(f"Map not identified after 'm' press (attempt {fail_attempt + 1}/{max_failcount}). Retrying.")
-        # time.sleep(5)
+        # sleep(5)
 
     logger.error(f"Failed to open map after {max_failcount} attempts.")
     return False
@@ -371,32 +400,31 @@ def isplayer():
 
 def findevent():
     global numofevents
-    icon_path = 'icons/lowresicon.png'
-    overweight_icon = "icons/overweight.png"
-    dailyops = 'icons/tester.png'
+    overweight_icon = "overweight"
     if not openmap():
         logger.warning("Could not open map to find event.")
         return False
     try:
-        target_icon_list = find_icon_positions(dailyops) + find_icon_positions('icons/tester1.png') + find_icon_positions('icons/tester2.png')
+        frame = Frame.grab()
+        target_icon_list = find_icon_positions('dailyops', frame)
         target_icon_pos = target_icon_list[0]
         logger.info("Clicking on daily ops to reveal events.")
-        pyautogui.moveTo(target_icon_pos[0], target_icon_pos[1], 0.4)
         for attempt in range(3):
             try:
-                click(target_icon_pos[0], target_icon_pos[1])
-                time.sleep(1)
-                target_icon_list = find_icon_positions(dailyops) + find_icon_positions('icons/tester1.png') + find_icon_positions('icons/tester2.png')
+                run_macro(DAILY_OPS, {"target": target_icon_pos})
+                frame = Frame.grab()
+                target_icon_list = find_icon_positions('dailyops', frame)
                 target_icon_pos = target_icon_list[0]
             except IndexError:
                 logger.info("No daily ops icon found. Assuming click failed and cursor blocking icon.")
-                time.sleep(1)
+                sleep(1)
                 continue
             break
         
         max_join_attempts = 3
         for attempt in range(max_join_attempts):
-            icons_list = find_icon_positions(icon_path) + find_icon_positions('icons/mutieevent.png') + find_icon_positions('icons/lowresicon1.png')
+            frame = Frame.grab()
+            icons_list = find_event_markers(frame)
             if not icons_list:
                 inputs.press("TAB", 0.1)
                 logger.info("Event icon not found on map.")
@@ -406,24 +434,19 @@ def findevent():
             logger.info(f"Found {numofevents} event icon(s). Targeting the first one.")
             target_icon_pos = icons_list[0]
             
-            
-            pyautogui.moveTo(target_icon_pos[0], target_icon_pos[1], 0.4)
-            click(target_icon_pos[0], target_icon_pos[1])
-            time.sleep(0.3)
-
-            inputs.press("ENTER", 0.1)
-            time.sleep(0.3)
-            inputs.press("ENTER", 0.1)
-            time.sleep(0.5)
+            if not run_macro(FAST_TRAVEL, {"target": target_icon_pos}, {"map_open": lambda: bool(find_icon_positions('score'))}):
+                logger.info("Map closed before the event could be clicked.")
+                return False
 
 
-            if find_icon_positions(overweight_icon):
+            frame = Frame.grab()
+            if find_icon_positions(overweight_icon, frame):
                 logger.warning("Player overweight, cannot fast travel to event. Shutting down.")
-                okcheck()
+                okcheck(frame)
                 leave()
                 exit(1)
 
-            if not find_icon_positions('icons/scoreicon.png'):
+            if not find_icon_positions('score', frame):
                 logger.info("Map closed after attempting to join event, assuming fast travel initiated.")
                 return True 
 
@@ -431,8 +454,8 @@ def findevent():
                 logger.info(f"Re-attempmting to join event (attempt {attempt + 2}).")
             else:
                 logger.warning("Failed to confirm event join after multiple attempts (icon still present).")
-                return True # True because the next decisionTree scan will handle it
-            time.sleep(0.1)
+                return True # True because the next state machine tick will handle it
+            sleep(0.1)
             openmap()
         
         return False
@@ -441,21 +464,22 @@ def findevent():
         logger.exception("Error during findevent:")
         return False
 
-def okcheck():
+def okcheck(frame=None):
     limit = 0
     while limit < 3: 
-        ok_icon_list = find_icon_positions("icons/ok.png")
+        ok_icon_list = find_icon_positions("ok", frame)
+        frame = None # Only the first check can use the caller's snapshot
         if ok_icon_list:
             okicon = ok_icon_list[0]
             logger.info(f"Found 'OK' button at {okicon}. Clicking.")
-            pyautogui.moveTo(okicon[0], okicon[1], 0.2)
-            time.sleep(0.1)
+            inputs.move_to(okicon[0], okicon[1], GLIDE)
+            sleep(0.05)
             inputs.press("enter", 0.1) 
-            time.sleep(0.2)
+            sleep(0.2)
             return True 
         else:
             limit += 1
-            if limit < 3 : time.sleep(0.1) 
+            if limit < 3 : sleep(0.1) 
     
     return False
 
@@ -473,7 +497,7 @@ def whenplayerload():
             return True
         
         logger.info(f"Player not loaded yet (check {check_num + 1}/{max_load_checks}). Waiting 10 seconds.")
-        time.sleep(10)
+        sleep(10)
 
         if okcheck():
             logger.info("Handled an 'OK' popup during load check.")
@@ -505,28 +529,14 @@ def leave():
 
         logger.info(f"Leave attempt #{attempt_num + 1}")
         
-        inputs.press("c", 0.1)
-        time.sleep(0.35)
-        pyautogui.moveTo(1200, 100, 0.5)
-        click(1200, 100)
-        time.sleep(0.5)
-        inputs.press("enter", 0.1)
-        time.sleep(0.25)
-        inputs.press("enter", 0.1)
-        time.sleep(2)
-        if ismainmenu():
+        # Ends by waiting (up to 7s) for the main menu
+        if run_macro(LEAVE, conditions={"mainmenu": ismainmenu}):
             leavefail = 0
             return True
 
-        for _ in range(5): 
-            if ismainmenu(): 
-                leavefail = 0
-                return True 
-            time.sleep(1)
-        else: 
-            if attempt_num < max_leave_attempts - 1:
-                 logger.info("Main menu not reached yet, will try next method or retry.")
-                 time.sleep(1)
+        if attempt_num < max_leave_attempts - 1:
+             logger.info("Main menu not reached yet, will try next method or retry.")
+             sleep(1)
     
     logger.error("Failed to leave to main menu after all attempts.")
     if leavefail == 9: 
@@ -543,26 +553,17 @@ def join():
 
     for _ in range(3):
         retry = False
-        pyautogui.moveTo(175, 260, 0.3)
-        click(175, 260)
-        time.sleep(0.4)
-        inputs.press("enter", 0.1)
-        time.sleep(0.4)
-        inputs.press("enter", 0.1)
-        
         logger.info("Join initiated, waiting for popups/load screen...")
-        time.sleep(2) 
+        run_macro(JOIN)
 
         if not ismainmenu():
             logger.info("Left main menu.")
             out = readui(False, 1)
-            checks = ["tab)", "more info", "t)", "enter)"]
-            for check in checks:
-                if check in out:
-                    logger.info("Failed to join. Identified '{check}' on screen.")
-                    inputs.press("tab", 0.1)
-                    time.sleep(0.2)
-                    retry = True
+            for check in dict.fromkeys(ui_keywords.classify(out).keywords("joinfail")):
+                logger.info(f"Failed to join. Identified '{check}' on screen.")
+                inputs.press("tab", 0.1)
+                sleep(0.2)
+                retry = True
             if ismainmenu(): continue
             if retry: return False
             return True
@@ -577,8 +578,7 @@ def join():
 
 def checkevent(badeventcheck=False):
     global numofevents
-    icon_path = 'icons/lowresicon.png'
-    scoreicon = "icons/scoreicon.png"
+    scoreicon = "score"
 
     logger.info(f"Checking event status. Badeventcheck mode: {badeventcheck}")
 
@@ -589,7 +589,8 @@ def checkevent(badeventcheck=False):
             max_map_checks = 4
             event_found_on_map = False
             for _ in range(max_map_checks):
-                current_icons = find_icon_positions(icon_path) + find_icon_positions('icons/mutieevent.png') + find_icon_positions('icons/lowresicon1.png')
+                frame = Frame.grab()
+                current_icons = find_event_markers(frame)
                 if current_icons:
                     if len(current_icons) < numofevents:
                         logger.info("Fewer event icons than before. Trying to re-target/join a new one.")
@@ -605,7 +606,7 @@ def checkevent(badeventcheck=False):
                 else: 
                     logger.info("No event icons found on map.")
                     event_found_on_map = False
-                    time.sleep(1) 
+                    sleep(1) 
             
             closemap()
             if event_found_on_map:
@@ -615,11 +616,13 @@ def checkevent(badeventcheck=False):
                 logger.info("Event check (map): No suitable event found or confirmed via map icons.")
     
     logger.info("Proceeding with UI text based event check.")
-    okcheck() 
+    frame = Frame.grab()
+    if okcheck(frame):
+        frame = Frame.grab()
     
-    _score_list = find_icon_positions(scoreicon)
+    _score_list = find_icon_positions(scoreicon, frame)
     if _score_list:
-        dailyopslist = find_icon_positions('icons/tester.png') + find_icon_positions('icons/tester1.png') + find_icon_positions('icons/tester2.png')
+        dailyopslist = find_icon_positions('dailyops', frame)
         if not dailyopslist:
             logger.info("UI Check: Score icon present, dailyops not. Player might be dead.")
             dead()
@@ -627,23 +630,22 @@ def checkevent(badeventcheck=False):
     else:
         logger.info("UI Check: Score icon not found. Pressing space (generic interaction).")
         inputs.press("space", 0.1)
-        time.sleep(1)
+        sleep(1)
 
-    event_keywords = ["event", "event:"]
-    bad_event_keywords = ["feed the people", "feed", "people", "beasts of burden", "beasts", "burden", "distinguished guests", "distinguished", "jail break", "jail"]
-    
     max_ui_reads = 3
     found_good_event_text = False
     
     for _ in range(max_ui_reads):
-        uitext = readui(True, 0).lower()
-        logger.debug(f"UI Text for event check: '{uitext[:100]}...'")
+        uiRead = readui_result(True, 0)
+        uitext = uiRead.text
+        logger.debug(f"UI Text for event check: '{uitext[:100]}...' ({uiRead.confidence:.0f}% confidence)")
 
-        is_generic_event = any(word in uitext for word in event_keywords)
+        uiHits = ui_keywords.classify(uitext)
+        is_generic_event = uiHits.found("event")
         
         if is_generic_event:
             return True
-            is_bad_event = any(bad_word in uitext for bad_word in bad_event_keywords)
+            is_bad_event = uiHits.found("badeventname")
             if is_bad_event:
                 logger.info("UI Text: Detected a 'bad' event.")
                 return False 
@@ -653,9 +655,11 @@ def checkevent(badeventcheck=False):
                 break 
         else: 
             logger.info("UI Text: No event-related keywords found.")
+            # A clean read without event text won't change in 2 seconds, no need to re-read
+            if uiRead.confident(CONFIDENT_READ): break
         
         if found_good_event_text: break
-        time.sleep(2)
+        sleep(2)
 
     if found_good_event_text:
         logger.info("Event check (UI): Confirmed a 'good' event is active.")
@@ -665,15 +669,10 @@ def checkevent(badeventcheck=False):
         return False
 
 def mapclick(x, y):
-    scoreicon = "icons/scoreicon.png"
-    time.sleep(0.05)
-    pyautogui.moveTo(x,y,0.1) 
-    pyautogui.click(x, y)
-    time.sleep(0.2)
-    inputs.press("enter", 0.05)
-    time.sleep(0.2)
-    inputs.press("enter", 0.05)
-    time.sleep(0.3)
+    cancel_token.check() # The respawn spiral calls this dozens of times
+    # x, y are measured on a 1280x800 client area
+    scoreicon = "score"
+    run_macro(MAP_CLICK, {"target": to_screen(normalized(x, y))})
     if find_icon_positions(scoreicon): 
         return True 
     else:
@@ -682,18 +681,18 @@ def mapclick(x, y):
 
 def pipboyeventcheck():
     switch_to_application()
-    datatab_icon = "icons/datatab.png"
-    eventtab_icon = "icons/eventtab.png"
-    scoreicon = "icons/scoreicon.png"
+    datatab_icon = "datatab"
+    eventtab_icon = "eventtab"
+    scoreicon = "score"
 
     if find_icon_positions(scoreicon):
         logger.info("Map is open, pressing 'm' to close before accessing PipBoy.")
         inputs.press("m", 0.05)
-        time.sleep(0.5)
+        sleep(0.5)
 
     logger.info("Opening PipBoy (Tab).")
     inputs.press("tab", 0.05)
-    time.sleep(1)
+    sleep(1)
 
     max_find_data_tab_tries = 10
     data_tab_found = False
@@ -703,12 +702,12 @@ def pipboyeventcheck():
         if datapos_list:
             datapos = datapos_list[0]
             logger.info(f"Found data tab at {datapos}.")
-            pyautogui.click(datapos[0], datapos[1])
+            inputs.click(datapos[0], datapos[1])
             data_tab_found = True
             break
         else:
             logger.warning(f"Data tab not found (attempt {i+1}). Waiting briefly.")
-            time.sleep(0.3) 
+            sleep(0.3) 
     
     if not data_tab_found:
         logger.error("Failed to find or click the Data tab in PipBoy.")
@@ -722,20 +721,20 @@ def pipboyeventcheck():
         if eventpos_list:
             eventpos = eventpos_list[0]
             logger.info(f"Found event sub-tab at {eventpos}.")
-            pyautogui.click(eventpos[0], eventpos[1])
+            inputs.click(eventpos[0], eventpos[1])
             event_tab_found = True
             break
         else:
             logger.info(f"Event sub-tab not found, pressing right arrow (attempt {i+1}).")
             inputs.arrow("right")
-            time.sleep(0.3)
+            sleep(0.3)
 
     if not event_tab_found:
         logger.error("Failed to find or click the Event sub-tab.")
     else:
         logger.info("Successfully navigated to PipBoy event tab.")
     
-    time.sleep(0.5)
+    sleep(0.5)
     logger.info("Closing PipBoy (Tab).")
     inputs.press("tab", 0.05)
 
@@ -744,7 +743,7 @@ def dead():
     logger.info("Player is dead or needs respawn. Searching for respawn location on map.")
     
     inputs.press("space", 0.05)
-    x, y = 640, 400 
+    x, y = 640, 400 # Map centre at 1280x800, mapclick scales to the real window
     mult = 1
     stage = 1
     meta = 2 
@@ -752,7 +751,7 @@ def dead():
     max_spiral_iterations = 50 
     iterations_done = 0
     map_still_open_after_click = True 
-    time.sleep(5)
+    sleep(5)
     while map_still_open_after_click and iterations_done < max_spiral_iterations:
         current_stage_clicks = 0
         target_clicks_in_stage = 0
@@ -796,30 +795,21 @@ def dead():
             logger.warning("Max spiral iterations reached for dead/respawn. Aborting search.")
             return False
     
-    if find_icon_positions("icons/scoreicon.png"): 
+    if find_icon_positions("score"): 
         logger.info("Closing map after respawn search attempt.")
         closemap()
 
 def perkselect():
     logger.info("Executing perkselect function (currently minimal).")
     switch_to_application("Fallout76") or switch_to_application("Project76")
-    time.sleep(0.3)
-    inputs.press("tab", 0.1)
-    time.sleep(0.3)
-    
-    pyautogui.moveTo(650, 460, 0.3)
-    pyautogui.click(650, 460)
-    time.sleep(0.1) 
-    inputs.press("enter", 0.1)
-    time.sleep(0.1) 
-    inputs.press("q", 0.1)
+    run_macro(PERK_SELECT)
     logger.info("Perkselect: Navigated to perk interface (assumed) and pressed 'q'. Further implementation needed.")
-    time.sleep(0.5)
-    inputs.press("tab", 0.1)
 
 
-def ismainmenu():
-    if find_icon_positions("icons/menuicon.png") or find_icon_positions("icons/fo1menuicon.png"):
+def ismainmenu(frame=None):
+    if frame is None:
+        frame = Frame.grab()
+    if find_icon_positions('menu', frame):
         logger.debug("Menu identified.") # Changed to debug as it can be frequent
         return True
     else:
@@ -833,196 +823,218 @@ def event():
 def noevent():
     return
 
-def decisionTree():
-    if not (switch_to_application()):
+# --- State machine detectors, see states.py. Icon lookups and the OCR read are shared within a tick ---
+def tick_cache(frame):
+    # Drops the cached icons and text when they were made on another frame
+    global tickFrame, tickIcons, tickText
+    if frame is not tickFrame:
+        tickFrame, tickIcons, tickText = frame, {}, None
+
+
+def tick_icons(frame, name):
+    tick_cache(frame)
+    if name not in tickIcons:
+        tickIcons[name] = find_event_markers(frame) if name == "event" else find_icon_positions(name, frame)
+    return tickIcons[name]
+
+
+def tick_text(frame):
+    # (keyword hits, OcrResult) of the frame's UI text, both palettes in one OCR call
+    global tickText
+    tick_cache(frame)
+    if tickText is None:
+        palettes = readui_palettes(False, (1, 0), frame)
+        uiRead = ocr.OcrResult(palettes[1].words + palettes[0].words)
+        tickText = (ui_keywords.classify(f"{palettes[1].text} {palettes[0].text}"), uiRead)
+        logger.info(f"uiText: {palettes[1].text} {palettes[0].text} ({uiRead.confidence:.0f}% confidence)")
+    return tickText
+
+
+def respawn_screen(frame):
+    # Map in respawn mode (score without daily ops) or the respawn prompt
+    if tick_icons(frame, "score") and not tick_icons(frame, "dailyops"):
+        return True
+    return 3 in tick_text(frame)[0].values("nav")
+
+
+def event_over(frame):
+    # No event text in a clean read (or nothing to read at all). A garbled read (one unsure
+    # HUD or compass fragment is enough) only counts once event text has been gone EVENT_OVER_GRACE.
+    # Whole tokens only, like decisionTree counted them: "prevent" isn't event text
+    global lastEventText
+    uiHits, uiRead = tick_text(frame)
+    if uiHits.count("event") > 0:
+        lastEventText = timing.now()
         return False
-    
-    # Scans for images
-    # 0: Menu, 1: Map Event, 2: Ok, 3: Overweight, 4: Score, 5: Daily Ops, 6: Watericon
-    iconList =  [find_icon_positions("icons/menuicon.png") + find_icon_positions("icons/fo1menuicon.png"), # Menu icon
-    find_icon_positions("icons/mutieevent.png") + find_icon_positions("icons/lowresicon.png") + find_icon_positions("icons/lowresicon1.png"), # Event map icon
-    find_icon_positions("icons/ok.png"),
-    find_icon_positions("icons/overweight.png"),
-    find_icon_positions("icons/scoreicon.png"), 
-    find_icon_positions("icons/tester.png") + find_icon_positions('icons/tester2.png') + find_icon_positions('icons/tester1.png'), # Daily ops map icon
-    find_icon_positions("icons/watericon.png")]
-    iconBoolList = [] # 0: Menu, 1: Map Event, 2: Ok, 3: Overweight, 4: Score, 5: Daily Ops, 6: Watericon
-    
-    logger.info(f"iconList:\n{iconList}")
-    if iconList[2] != []: return okcheck() # Returns true/false
-    iconCount = 0
-    for icon in iconList: 
-        if icon != []:
-            iconBoolList.append(True)
-            iconCount += 1
-        else:
-            iconBoolList.append(False)
-    logger.info(f"iconBoolList:\n{iconBoolList}")
-    
-    # Reads screen
-    uiText = readui(False, 1)
-    uiText = f"{uiText} {readui(False, 0)}"
-    print(uiText)
-    uiText = uiText.split()
-    logger.info(f"uiText:\n{uiText}")
-
-    # Dictionairy init
-    preMainDict = {"press" : 0, "any" : 1, "button" : 2, "start" : 3, "continue" : 4, "tab)" : 5}
-    generalNavDict = {"tab)" : 0, "t)" : 1, "enter)" : 2, "respawn" : 3, "back": 4}
-    eventDict = {"event" : 0, "event:" : 1}
-    loadingDict = {"loading" : 4, "by...": 5, "loading." : 7, "loading.." : 8, "loading..." : 9}
-    badeventDict = {"free" : 0, "range" : 1, "distinguished" : 2, "guests": 3} #, "load" : 2, "baring" : 3}# "moonshine" : 4, "jamboree" : 5} # "feed" : 0, "the" : 1, "people" : 2, "beasts" : 3, "of" : 4, "burden" : 5, "distinguished" : 6, "guests" : 7, "jail" : 8, "break" : 9, }
-    
-    # Read ui results formatting/init
-    resultTable = [[],[],[],[],[]] # 0: Premain results, 1: General Nav results, 2: Event results, 3: Loading results
-    preMainCount = 0
-    generalNavCount = 0
-    eventCount = 0
-    loadingCount = 0
-    badEventCount = 0
-    for item in uiText:
-        
-        itm = f"{item.strip()}"
-        try:
-            resultTable[0].append(preMainDict[itm])
-            preMainCount += 1
-        except KeyError:
-            True
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())
-        try:
-            resultTable[1].append(generalNavDict[itm])
-            generalNavCount += 1
-        except KeyError:
-            True
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())
-        try:
-            resultTable[2].append(eventDict[itm])
-            eventCount += 1
-        except KeyError:
-            True
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())
-        try:
-            resultTable[3].append(loadingDict[itm])
-            loadingCount += 1
-        except KeyError:
-            True
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())
-        try:
-            resultTable[4].append(badeventDict[itm])
-            badEventCount += 1
-        except KeyError:
-            True
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())
-    
-    logger.info(f"ReadUI Result Table:\n{resultTable}")
-    
-    # If no icons are found
-    if iconCount == 0:
-        
-        # Loading
-        if loadingCount > 0:
-            logger.info("Loading...")
-            time.sleep(10)
-            return True
-        
-        # Premain menu
-        if preMainCount > 1:
-            premainBool = True
-            for item in iconList:
-                if item != []: 
-                    premainBool = False
-                    logger.info("preMain words found but icon also found, assuming not preMainMenu.")
-                    break
-            if premainBool:
-                logger.info("pre main menu identified.")
-                inputs.press("tab", 0.1)
-                time.sleep(0.3)
-                inputs.press("tab", 0.1)
-                time.sleep(5)
-                return True
-        
-        if 3 in resultTable[1]: return dead() # Respawn
-        
-        if badEventCount > 1 and eventCount > 0: return leave() # Bad event detected, leave
-        
-        hehe = openmap() # Check if in game
-        
-        if hehe and eventCount == 0 and not findevent(): return leave() # Not in event, leave
-        elif not hehe:
-            inputs.press("tab", 0.1)
-            time.sleep(0.1)
-            inputs.press("space", 0.1)
-        closemap()
-        # This code isnt used, but kept for reference
-        """if 1 <= resultTable[2]: 
-            inputs.press("space", 0.1)
-            logger.info("Player still in event.")
-            time.sleep(5)
-            return True"""
-            
-        if generalNavCount > 0: inputs.press("tab", 0.1)
-        if eventCount > 0: time.sleep(10)
-        logger.info("Player still in event or stuck in pre-main menu.")
+    if not uiRead.words or uiRead.confident(CONFIDENT_READ):
         return True
-    
-    
-    # 0: Menu, 1: Map Event, 2: Ok, 3: Overweight, 4: Score, 5: Daily Ops, 6: Watericon, 7: mutie event icon
-    match iconBoolList:
-        case [True, False, False, False, False, False, False]: # At Main menu
-            return join() # Returns true/false
-        case [False, False, False, False, True, True, False]: # Map open, no event
-            return leave() # Returns true/false
-        case [False, True, False, False, True, True, False]: # Map open, is event
-            if findevent():
-                time.sleep(1)
-                return True
+    return timing.now() - max(lastEventText, state_machine.entered) > EVENT_OVER_GRACE
+
+
+DETECTORS = {
+    "ok": lambda frame: bool(tick_icons(frame, "ok")),
+    "menu": lambda frame: bool(tick_icons(frame, "menu")),
+    "menu_gone": lambda frame: not tick_icons(frame, "menu"),
+    "map": lambda frame: bool(tick_icons(frame, "score")) and bool(tick_icons(frame, "dailyops")),
+    "map_gone": lambda frame: not tick_icons(frame, "score"),
+    "hud": lambda frame: bool(tick_icons(frame, "water")),
+    "respawn": respawn_screen,
+    "loading_text": lambda frame: tick_text(frame)[0].count("loading") > 0,
+    "premain_text": lambda frame: tick_text(frame)[0].count("premain") > 1,
+    "event_text": lambda frame: tick_text(frame)[0].count("event") > 0,
+    "event_over": event_over,
+}
+state_machine = StateMachine(BOT_TRANSITIONS, DETECTORS)
+
+
+# --- What the bot does in each state. False means the game is stuck and gets restarted ---
+def on_unknown(frame):
+    # Nothing confirmed any state: probe with the map like decisionTree did, in the world it opens
+    logger.info("Could not determine state, probing with the map.")
+    if openmap(frame):
+        state_machine.enter(MAP_OPEN)
+        return True
+    # Back out of whatever menu might be open
+    inputs.press("tab", 0.1)
+    sleep(0.1)
+    inputs.press("space", 0.1)
+    if tick_text(frame)[0].count("nav") > 0: inputs.press("tab", 0.1)
+    return True
+
+
+def on_premain(frame):
+    # Press through once, then give the main menu PREMAIN_WAIT to show up instead of
+    # pressing again every tick (extra presses land on whatever screen loads next)
+    global premainPressed
+    if timing.now() - premainPressed < PREMAIN_WAIT:
+        return True
+    logger.info("pre main menu identified.")
+    inputs.press("tab", 0.1)
+    sleep(0.3)
+    inputs.press("tab", 0.1)
+    premainPressed = timing.now()
+    return True
+
+
+def on_main_menu(frame):
+    if not join():
+        return False
+    state_machine.enter(LOADING)
+    return True
+
+
+def on_loading(frame):
+    logger.info("Loading...")
+    return True
+
+
+def on_in_world(frame):
+    # Give the event UI a moment to show up after a fast travel before looking for another event
+    if state_machine.elapsed < IN_WORLD_GRACE:
+        return True
+    if openmap(frame):
+        state_machine.enter(MAP_OPEN)
+    else:
+        inputs.press("tab", 0.1)
+        sleep(0.1)
+        inputs.press("space", 0.1)
+    return True
+
+
+def on_map_open(frame):
+    if tick_icons(frame, "event"):
+        if not findevent():
             return False
-        case [False, False, False, False, False, False, True]: # Loaded in
-            """# If Not In Event
-            if eventCount == 0:
-                openmap()
-                if not findevent(): 
-                    return leave() # Returns true/false
-            """
-            # if In Event
-            return True
-        
-    # Failure to decide
-    if generalNavCount > 0: inputs.press("tab", 0.1)
-    logger.info("Decision tree could not determine state, waiting briefly.")
-    time.sleep(5)
+        state_machine.enter(LOADING) # Fast travelling
+        return True
+    leave() # No event to join, leave for another server
+    state_machine.enter(LOADING)
+    return True
+
+
+def on_dead(frame):
+    if dead() == False:
+        return False
+    state_machine.enter(LOADING)
+    return True
+
+
+def on_in_event(frame):
+    uiHits = tick_text(frame)[0]
+    if uiHits.count("badevent") > 1:
+        logger.info("Bad event detected, leaving.")
+        leave()
+        state_machine.enter(LOADING)
+    return True
+
+
+def on_popup(frame):
+    result = okcheck(frame)
+    state_machine.enter(state_machine.previous) # The popup was on top of it
+    return result
+
+
+STATE_HANDLERS = {
+    UNKNOWN: on_unknown, PREMAIN: on_premain, MAIN_MENU: on_main_menu, LOADING: on_loading, IN_WORLD: on_in_world,
+    MAP_OPEN: on_map_open, DEAD: on_dead, IN_EVENT: on_in_event, POPUP: on_popup,
+}
+
+
+def decisionTree():
+    cancel_token.check()
+    if not (switch_to_application()):
+        return False
+
+    # One capture per tick. On a static screen (loading, menus, standing in an event)
+    # the last changed frame is kept, so its cached detections are reused
+    frame = Frame.grab()
+    if tickFrame is None: screen_changes.reset()
+    if not screen_changes.changed(frame) and tickFrame is not None:
+        logger.info("Screen unchanged since last tick, reusing previous detections.")
+        frame = tickFrame
+
+    transition = state_machine.update(frame)
+    if transition is not None:
+        logger.info(f"State: {transition.source} -> {transition.target} ({transition.detector})")
+    return STATE_HANDLERS[state_machine.state](frame)
 
 def main(tesseract_path, fallout_path, ini_path, height, width, loc_x, loc_y, fullscreen, borderless):
     global falloutpath, leavefail, lastss, numofevents
     falloutpath = fallout_path
+    capture.set_dpi_aware() # Before any window rect, capture or click
     tesseract_path_init(tesseract_path)
-    if [height, width, loc_x, loc_y, fullscreen, borderless] != [800,1280,0,0,0,1]:
+    templates.load()
+    event_markers.calibrate(templates.get("event"))
+    frame_buffer.start(rate=FRAME_BUFFER_RATE, size=FRAME_BUFFER_SIZE)
+    roi_index.load()
+    keyword_spotter_init(KEYWORD_DIR)
+    # Any window size works, icons and clicks are scaled to the live client rect.
+    # Exclusive fullscreen can't be captured though, so that alone still needs a relaunch.
+    if fullscreen:
         close_exe()
         import configparser
         # Create a ConfigParser object
         config = configparser.ConfigParser()
         config.read(ini_path)
-        config.set('Display', 'iSize H', '800')
-        config.set('Display', 'iSize W', '1280')
-        config.set('Display', 'iLocation X', '0')
-        config.set('Display', 'iLocation Y', '0')
         config.set('Display', 'bFull Screen', '0')
         config.set('Display', 'bBorderless', '1')
         with open(ini_path, 'w') as configfile:
             config.write(configfile)
     setup_logger() # Initialize the logger
+    game_process.subscribe(on_game_process)
+    watchdog.start()
+    ticks = 0
     while True:
-        if decisionTree() == False:
+        ticks += 1
+        if ticks % TIMING_REPORT_TICKS == 0:
+            logger.info(f"Wait times by caller:\n{timing.report()}")
+            logger.info(f"Detector costs:\n{state_machine.report()}")
+        try:
+            if decisionTree() == False:
+                close_exe()
+                timing.sleep(5)
+        except GameExited as e:
+            # Game died mid-action: drop the action, the next tick relaunches it
+            logger.warning(f"{e}, aborting current action and relaunching.")
             close_exe()
-            time.sleep(5)
-        time.sleep(1)
\ No newline at end of file
+        timing.sleep(1)
\ No newline at end of file
@@ -0,0 +1,138 @@
+'''
+Central clock for the bot's waits.
+
+Clock.sleep waits on a deadline: a coarse OS sleep until SPIN_MARGIN before
+it, then a short spin, so a 10 ms wait really is 10 ms instead of whatever
+the OS timer rounds it to. Every wait is accounted (requested vs. actual)
+under the name of the function that asked for it, see report().
+
+The module functions (now, sleep, sleep_until) go through the current clock,
+set_clock swaps in e.g. a FakeClock for tests.
+
+@author: NobodyKnowNothing
+'''
+import sys
+import time
+import threading
+
+SPIN_MARGIN = 0.002 # Seconds before a deadline where sleeping stops and spinning starts
+
+
+def caller(depth):
+    try:
+        return sys._getframe(depth + 1).f_code.co_name
+    except ValueError:
+        return "?"
+
+
+class Clock:
+    def __init__(self):
+        self.stats = {} # label -> [waits, requested seconds, actual seconds]
+        self.lock = threading.Lock()
+        self._raise_timer_resolution()
+
+    @staticmethod
+    def _raise_timer_resolution():
+        # Windows sleeps in ~15.6 ms ticks by default, ask for 1 ms
+        try:
+            import ctypes
+            ctypes.windll.winmm.timeBeginPeriod(1)
+        except (ImportError, AttributeError, OSError):
+            pass
+
+    def now(self):
+        return time.perf_counter()
+
+    def _account(self, label, requested, actual):
+        with self.lock:
+            stats = self.stats.setdefault(label, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += requested
+            stats[2] += actual
+
+    def sleep_until(self, deadline, wake=None, label=None):
+        """Waits until now() >= deadline. wake: optional threading.Event that ends the wait early.
+        Returns True when woken by the event."""
+        start = self.now()
+        woken = False
+        while True:
+            remaining = deadline - self.now()
+            if remaining <= 0:
+                break
+            if wake is not None and wake.is_set():
+                woken = True
+                break
+            if remaining > SPIN_MARGIN:
+                coarse = remaining - SPIN_MARGIN
+                if wake is not None:
+                    if wake.wait(coarse):
+                        woken = True
+                        break
+                else:
+                    time.sleep(coarse)
+            else:
+                time.sleep(0) # Spin, but let other threads run
+        self._account(label or caller(1), max(0.0, deadline - start), self.now() - start)
+        return woken
+
+    def sleep(self, seconds, wake=None, label=None):
+        return self.sleep_until(self.now() + max(0.0, seconds), wake, label or caller(1))
+
+    def report(self, top=15):
+        """Waits grouped by caller, most actual time first."""
+        with self.lock:
+            rows = sorted(self.stats.items(), key=lambda item: -item[1][2])[:top]
+        lines = []
+        for label, (waits, requested, actual) in rows:
+            drift = (actual - requested) / waits * 1000 if waits else 0
+            lines.append(f"{label}: {waits} waits, requested {requested:.1f}s, actual {actual:.1f}s ({drift:+.1f} ms/wait)")
+        return "\n".join(lines)
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats.clear()
+
+
+class FakeClock(Clock):
+    """Virtual time for tests: sleeping advances now() instantly."""
+
+    def __init__(self, start=0.0):
+        self.time = start
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def now(self):
+        return self.time
+
+    def sleep_until(self, deadline, wake=None, label=None):
+        requested = max(0.0, deadline - self.time)
+        if wake is not None and wake.is_set():
+            self._account(label or caller(1), requested, 0.0)
+            return True
+        self.time = max(self.time, deadline)
+        self._account(label or caller(1), requested, requested)
+        return False
+
+
+clock = Clock()
+
+
+def set_clock(new_clock):
+    global clock
+    clock = new_clock
+
+
+def now():
+    return clock.now()
+
+
+def sleep(seconds, wake=None, label=None):
+    return clock.sleep(seconds, wake, label or caller(1))
+
+
+def sleep_until(deadline, wake=None, label=None):
+    return clock.sleep_until(deadline, wake, label or caller(1))
+
+
+def report(top=15):
+    return clock.report(top)
@@ -0,0 +1,709 @@
+'''
+Screen snapshot helpers shared by the icon detectors and the OCR code.
+
+@author: NobodyKnowNothing
+'''
+import os
+import json
+import time
+import threading
+import collections
+import numpy as np
+import cv2
+import capture
+import timing
+
+# Resolution the icons were cut at and the hardcoded click points were measured at
+BASE_WIDTH = 1280
+BASE_HEIGHT = 800
+
+
+def normalized(x, y):
+    """Converts a point measured on a BASE_WIDTH x BASE_HEIGHT client area to 0-1 units."""
+    return (x / BASE_WIDTH, y / BASE_HEIGHT)
+
+
+def to_screen(point, rect=None):
+    """Maps a normalized (0-1) point to screen pixels inside the live game client rect."""
+    left, top, width, height = rect or capture.game_rect()
+    return int(round(left + point[0] * width)), int(round(top + point[1] * height))
+
+
+def ui_scale(game_size):
+    """How much bigger the game's UI is drawn than at the base resolution (follows height)."""
+    return game_size[1] / BASE_HEIGHT
+
+
+class Frame:
+    """A single screen capture that every detector in a tick reads from.
+
+    Holds the RGB pixels as a numpy array and lazily derives the BGR and
+    grayscale versions the first time they are asked for, so the colour
+    conversions are done once per capture instead of once per lookup.
+    """
+
+    def __init__(self, image, timestamp=None, origin=(0, 0), game_size=None):
+        self.rgb = np.asarray(image)
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.origin = origin # Screen position of pixel (0, 0)
+        # Size of the game client area the frame came from, decides template scale
+        self.game_size = game_size or (self.rgb.shape[1], self.rgb.shape[0])
+        self._bgr = None
+        self._gray = None
+        self._half_gray = None
+        self._hsv = None
+
+    @classmethod
+    def grab(cls, region=None):
+        """Returns the current screen (game client area unless region is given).
+
+        Served from the background frame buffer when it is running, so the
+        caller doesn't wait on a capture; otherwise grabs through the backend.
+        """
+        if frame_buffer.running:
+            frame = frame_buffer.recent()
+            if frame is not None:
+                return frame.crop_screen(region) if region else frame
+        return cls.capture(region)
+
+    @classmethod
+    def capture(cls, region=None):
+        """Always takes a new capture from the active capture backend."""
+        with capture.capture_lock:
+            backend = capture.get_backend()
+            image, origin = backend.grab(region)
+            game_size = tuple(backend.game_rect()[2:])
+        return cls(image, origin=origin, game_size=game_size)
+
+    @property
+    def width(self):
+        return self.rgb.shape[1]
+
+    @property
+    def height(self):
+        return self.rgb.shape[0]
+
+    @property
+    def bgr(self):
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self):
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2HSV)
+        return self._hsv
+
+    @property
+    def half_gray(self):
+        """Grayscale at half resolution, the coarse level of the matching pyramid."""
+        if self._half_gray is None:
+            self._half_gray = cv2.pyrDown(self.gray)
+        return self._half_gray
+
+    def crop_screen(self, region):
+        """Like crop, but region is in screen coordinates."""
+        left, top, width, height = region
+        left, top = max(0, left - self.origin[0]), max(0, top - self.origin[1])
+        return self.crop((left, top, width, height))
+
+    def crop(self, region):
+        """Returns a new Frame for region=(left, top, width, height) in frame pixels."""
+        left, top, width, height = region
+        return Frame(self.rgb[top:top + height, left:left + width], self.timestamp,
+                     (self.origin[0] + left, self.origin[1] + top), self.game_size)
+
+
+class FrameBuffer:
+    """Background capture thread keeping a ring buffer of timestamped Frames.
+
+    Consumers read frames that are already there instead of blocking on a
+    capture: the latest one, the first one taken after some time, or the
+    last few for temporal filtering.
+    """
+
+    def __init__(self, rate=10, size=30):
+        self.interval = 1.0 / rate
+        self.frames = collections.deque(maxlen=size)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def start(self, rate=None, size=None):
+        if rate:
+            self.interval = 1.0 / rate
+        if size:
+            self.frames = collections.deque(self.frames, maxlen=size)
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="FrameBuffer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+        with self.condition:
+            self.frames.clear()
+
+    def _run(self):
+        while self.running:
+            started = time.time()
+            try:
+                frame = Frame.capture()
+            except Exception as e:
+                print(f"Frame buffer capture failed: {e}")
+                time.sleep(self.interval)
+                continue
+            with self.condition:
+                self.frames.append(frame)
+                self.condition.notify_all()
+            time.sleep(max(0, self.interval - (time.time() - started)))
+
+    def latest(self):
+        with self.condition:
+            return self.frames[-1] if self.frames else None
+
+    def first_after(self, t, timeout=1.0):
+        """Oldest buffered frame taken after time t, waiting up to timeout seconds for one."""
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                for frame in self.frames:
+                    if frame.timestamp > t:
+                        return frame
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    return None
+                self.condition.wait(remaining)
+
+    def last(self, n):
+        """Up to n most recent frames, oldest first."""
+        with self.condition:
+            return list(self.frames)[-n:]
+
+    def recent(self):
+        """Latest frame if it is at most two capture intervals old, else waits briefly for the next."""
+        frame = self.latest()
+        if frame is not None and time.time() - frame.timestamp <= 2 * self.interval:
+            return frame
+        return self.first_after(time.time() - 2 * self.interval, timeout=4 * self.interval)
+
+
+frame_buffer = FrameBuffer() # Started by the bot's main(), Frame.grab reads from it while running
+
+
+def frame_burst(count, window):
+    """Returns count Frames spread over about window seconds, oldest first.
+
+    With the frame buffer running, frames it already holds from the last
+    window seconds are used and only missing ones are waited for. Without
+    it, count captures are taken window / (count - 1) seconds apart.
+    """
+    if frame_buffer.running:
+        now = time.time()
+        frames = [frame for frame in frame_buffer.last(len(frame_buffer.frames)) if frame.timestamp >= now - window]
+        while len(frames) < count:
+            frame = frame_buffer.first_after(frames[-1].timestamp if frames else now, timeout=window)
+            if frame is None:
+                break
+            frames.append(frame)
+        if len(frames) > count:
+            picks = np.linspace(0, len(frames) - 1, count).round().astype(int)
+            frames = [frames[i] for i in picks]
+        return frames
+
+    frames = []
+    for i in range(count):
+        if i:
+            timing.sleep(window / max(1, count - 1))
+        frames.append(Frame.capture())
+    return frames
+
+
+# Logical icon name -> (files in icons/, match confidence).
+# Variants of the same on-screen element share one name so callers ask for
+# "dailyops" instead of summing tester.png, tester1.png and tester2.png.
+ICON_SPECS = {
+    "menu": (["menuicon.png", "fo1menuicon.png"], 0.9),
+    "event": (["lowresicon.png", "mutieevent.png", "lowresicon1.png"], 0.9),
+    "ok": (["ok.png"], 0.9),
+    "overweight": (["overweight.png"], 0.9),
+    "score": (["scoreicon.png"], 0.9),
+    "dailyops": (["tester.png", "tester1.png", "tester2.png"], 0.9),
+    "water": (["watericon.png"], 0.9),
+    "datatab": (["datatab.png"], 0.9),
+    "eventtab": (["eventtab.png"], 0.9),
+}
+
+
+PYRAMID_MIN_SIZE = 16   # Icons smaller than this (px) skip the half resolution pass
+PYRAMID_SLACK = 0.25    # How far below confidence a coarse score may be and still get verified
+NMS_OVERLAP = 0.3       # Hits overlapping more than this (IoU) are the same icon
+
+
+class Template:
+    """One decoded icon image plus the metadata needed to match it."""
+
+    def __init__(self, name, group, path, image, confidence, scale=1.0):
+        self.name = name
+        self.scale = scale
+        self.group = group
+        self.path = path
+        self.confidence = confidence
+        if image.ndim == 3 and image.shape[2] == 4:
+            alpha = image[:, :, 3]
+            # Only keep a mask when the icon actually has transparent pixels
+            self.mask = None if alpha.min() == 255 else (alpha > 0).astype(np.uint8) * 255
+            image = image[:, :, :3]
+        else:
+            self.mask = None
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        self.bgr = image
+        self.gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.height, self.width = image.shape[:2]
+        # Half resolution copy for the coarse pass, too little detail left on tiny icons
+        if min(self.height, self.width) >= PYRAMID_MIN_SIZE:
+            self.small_gray = cv2.pyrDown(self.gray)
+            self.small_mask = None if self.mask is None else cv2.resize(
+                self.mask, (self.small_gray.shape[1], self.small_gray.shape[0]), interpolation=cv2.INTER_NEAREST)
+        else:
+            self.small_gray = None
+            self.small_mask = None
+
+
+    def scaled(self, scale):
+        """Returns a copy of this template resized for a UI drawn scale times bigger."""
+        width, height = max(1, round(self.width * scale)), max(1, round(self.height * scale))
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        image = cv2.resize(self.bgr, (width, height), interpolation=interpolation)
+        if self.mask is not None:
+            mask = cv2.resize(self.mask, (width, height), interpolation=cv2.INTER_NEAREST)
+            image = np.dstack([image, mask])
+        return Template(self.name, self.group, self.path, image, self.confidence, self.scale * scale)
+
+
+class TemplateRegistry:
+    """Decodes every icon once and hands out the arrays by logical name."""
+
+    def __init__(self, path_resolver, specs=ICON_SPECS, icon_dir="icons"):
+        self.path_resolver = path_resolver
+        self.specs = specs
+        self.icon_dir = icon_dir
+        self.groups = {}
+        self.scaled_groups = {} # (width, height) -> groups rescaled for that game size
+        self.loaded = False
+
+    def load(self):
+        self.groups = {}
+        self.scaled_groups = {}
+        for group, (files, confidence) in self.specs.items():
+            variants = []
+            for filename in files:
+                path = self.path_resolver(f"{self.icon_dir}/{filename}")
+                image = cv2.imread(path, cv2.IMREAD_UNCHANGED) if os.path.exists(path) else None
+                if image is None:
+                    print(f"Icon image could not be loaded: {path}")
+                    continue
+                variants.append(Template(filename.rsplit(".", 1)[0], group, path, image, confidence))
+            self.groups[group] = variants
+        self.loaded = True
+        return self
+
+    def get(self, group, game_size=None):
+        """Returns the list of Templates for a logical name ([] if unknown).
+
+        With game_size=(width, height) the templates are rescaled to that
+        client size; each size is only rescaled once.
+        """
+        if not self.loaded:
+            self.load()
+        if game_size is None or abs(ui_scale(game_size) - 1) < 0.01:
+            return self.groups.get(group, [])
+        game_size = tuple(game_size)
+        if game_size not in self.scaled_groups:
+            scale = ui_scale(game_size)
+            self.scaled_groups[game_size] = {
+                name: [template.scaled(scale) for template in variants] for name, variants in self.groups.items()}
+        return self.scaled_groups[game_size].get(group, [])
+
+    def names(self):
+        return list(self.specs)
+
+
+def _scores(image, template_image, mask):
+    result = cv2.matchTemplate(image, template_image, cv2.TM_CCOEFF_NORMED, mask=mask)
+    if mask is not None:
+        # Masked scores are undefined over flat areas
+        result = np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0)
+    return result
+
+
+def _peaks(result, threshold, width, height):
+    """Local maxima of a score map above threshold, as (xs, ys, scores)."""
+    kernel = np.ones((max(1, height // 2) * 2 + 1, max(1, width // 2) * 2 + 1), np.uint8)
+    peaks = (result >= cv2.dilate(result, kernel)) & (result > threshold)
+    ys, xs = np.nonzero(peaks)
+    return xs, ys, result[ys, xs]
+
+
+def _match_variant(frame, template):
+    """Returns (xs, ys, scores) of the top-left corners where template matches frame."""
+    haystack = frame.bgr
+    if haystack.shape[0] < template.height or haystack.shape[1] < template.width:
+        return np.empty(0, int), np.empty(0, int), np.empty(0, np.float32)
+
+    # Candidate pass on the frame's shared grayscale (half resolution when the
+    # icon is big enough), then verify each candidate in colour at full
+    # resolution in a small window around it
+    if template.small_gray is not None:
+        scale = 2
+        coarse = _scores(frame.half_gray, template.small_gray, template.small_mask)
+        cxs, cys, _ = _peaks(coarse, template.confidence - PYRAMID_SLACK,
+                             template.small_gray.shape[1], template.small_gray.shape[0])
+    else:
+        scale = 1
+        coarse = _scores(frame.gray, template.gray, template.mask)
+        cxs, cys, _ = _peaks(coarse, template.confidence - PYRAMID_SLACK, template.width, template.height)
+
+    xs, ys, scores = [], [], []
+    pad = scale
+    for cx, cy in zip(cxs * scale, cys * scale):
+        left, top = max(0, cx - pad), max(0, cy - pad)
+        window = haystack[top:top + template.height + 2 * pad, left:left + template.width + 2 * pad]
+        if window.shape[0] < template.height or window.shape[1] < template.width:
+            continue
+        result = _scores(window, template.bgr, template.mask)
+        _, best, _, (bx, by) = cv2.minMaxLoc(result)
+        if best > template.confidence:
+            xs.append(left + bx)
+            ys.append(top + by)
+            scores.append(best)
+    return np.array(xs, int), np.array(ys, int), np.array(scores, np.float32)
+
+
+def non_max_suppression(boxes, scores, overlap=NMS_OVERLAP):
+    """Indices of the boxes (N x 4 array of x, y, w, h) kept after greedy NMS."""
+    if len(boxes) == 0:
+        return np.empty(0, int)
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (areas[i] + areas[rest] - inter)
+        order = rest[iou <= overlap]
+    return np.array(keep, int)
+
+
+ROI_PAD = 24                # Margin (px) kept around a learned region
+ROI_MAX_REGIONS = 8         # Per template, oldest region is dropped past this
+ROI_SETTLE_HITS = 5         # Hits needed before misses stop forcing full scans
+ROI_FULL_SCAN_EVERY = 10    # Once settled, every Nth miss still does a full scan
+ROI_ALWAYS_FULL_SCAN = ("ok", "overweight", "datatab", "eventtab") # Popups/buttons whose place depends on the dialog layout
+ROI_SAVE_INTERVAL = 60      # Seconds between writes when only counters changed
+
+
+class RoiIndex:
+    """Remembers where each icon template has matched before.
+
+    Regions are stored per template and per frame size and persisted as JSON
+    so the next run starts with them. Searches try the learned windows first
+    and fall back to a full scan when they come up empty.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.misses = {}
+        self.dirty = False
+        self.last_save = 0
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading ROI index, starting empty: {e}")
+                self.entries = {}
+        return self
+
+    def save(self, force=False):
+        if not self.path or not self.dirty:
+            return
+        if not force and time.time() - self.last_save < ROI_SAVE_INTERVAL:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=4)
+            self.dirty = False
+            self.last_save = time.time()
+        except OSError as e:
+            print(f"Error saving ROI index: {e}")
+
+    @staticmethod
+    def key(template, frame):
+        return f"{template.group}/{template.name}@{frame.width}x{frame.height}"
+
+    def windows(self, key):
+        entry = self.entries.get(key)
+        return [tuple(region) for region in entry["regions"]] if entry else []
+
+    def should_full_scan(self, key):
+        """Called on a miss inside the learned windows."""
+        if key.split("/", 1)[0] in ROI_ALWAYS_FULL_SCAN:
+            return True # A missed popup costs a whole tick, a full scan doesn't
+        entry = self.entries.get(key)
+        # Every time the icon turned up outside its windows, demand more hits before trusting them
+        if not entry or entry["hits"] < ROI_SETTLE_HITS * (entry["escapes"] + 1):
+            return True
+        self.misses[key] = self.misses.get(key, 0) + 1
+        return self.misses[key] % ROI_FULL_SCAN_EVERY == 0
+
+    def record(self, key, boxes, escaped=False):
+        """Adds hit boxes (x, y, w, h); escaped means a full scan found them outside the windows."""
+        entry = self.entries.setdefault(key, {"regions": [], "hits": 0, "escapes": 0})
+        entry["hits"] += 1
+        if escaped:
+            entry["escapes"] += 1
+        regions_changed = False
+        for x, y, w, h in boxes:
+            region = [int(x) - ROI_PAD, int(y) - ROI_PAD, int(w) + 2 * ROI_PAD, int(h) + 2 * ROI_PAD]
+            for existing in entry["regions"]:
+                if _overlaps(existing, region):
+                    if not _contains(existing, region):
+                        left, top = min(existing[0], region[0]), min(existing[1], region[1])
+                        right = max(existing[0] + existing[2], region[0] + region[2])
+                        bottom = max(existing[1] + existing[3], region[1] + region[3])
+                        existing[:] = [left, top, right - left, bottom - top]
+                        regions_changed = True
+                    break
+            else:
+                entry["regions"].append(region)
+                del entry["regions"][:-ROI_MAX_REGIONS]
+                regions_changed = True
+        self.dirty = True
+        self.save(force=regions_changed)
+
+
+def _overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3])
+
+
+def _search_variant(frame, template, roi):
+    """Like _match_variant, but tries the learned regions of interest first."""
+    if roi is None:
+        return _match_variant(frame, template)
+
+    key = roi.key(template, frame)
+    windows = roi.windows(key)
+    xs, ys, scores = [], [], []
+    for left, top, width, height in windows:
+        left, top = max(0, left), max(0, top)
+        width, height = min(width, frame.width - left), min(height, frame.height - top)
+        if width < template.width or height < template.height:
+            continue
+        wxs, wys, wscores = _match_variant(frame.crop((left, top, width, height)), template)
+        xs.append(wxs + left)
+        ys.append(wys + top)
+        scores.append(wscores)
+    if xs and sum(len(found) for found in xs):
+        xs, ys, scores = np.concatenate(xs), np.concatenate(ys), np.concatenate(scores)
+        roi.record(key, [(x, y, template.width, template.height) for x, y in zip(xs, ys)])
+        return xs, ys, scores
+
+    if windows and not roi.should_full_scan(key):
+        return np.empty(0, int), np.empty(0, int), np.empty(0, np.float32)
+    xs, ys, scores = _match_variant(frame, template)
+    if len(xs):
+        roi.record(key, [(x, y, template.width, template.height) for x, y in zip(xs, ys)], escaped=bool(windows))
+    return xs, ys, scores
+
+
+def match_icons(frame, names, registry, roi=None):
+    """Finds every icon in names on frame in one pass.
+
+    Returns {name: [(x, y), ...]} with the centre of each hit. All variants of
+    a name, rescaled to the frame's game size, are matched against the same
+    cached grayscale/pyramid levels of the frame and overlapping hits are
+    collapsed with non-maximum suppression.
+    Hits are in screen coordinates, ordered by variant, then top-to-bottom, left-to-right.
+    With an RoiIndex only the learned windows are searched unless they miss.
+    """
+    results = {}
+    for name in names:
+        boxes, scores, order_keys = [], [], []
+        for index, template in enumerate(registry.get(name, frame.game_size)):
+            xs, ys, found = _search_variant(frame, template, roi)
+            for x, y, score in zip(xs, ys, found):
+                boxes.append((x, y, template.width, template.height))
+                scores.append(score)
+                order_keys.append((index, y, x))
+        if not boxes:
+            results[name] = []
+            continue
+        boxes = np.array(boxes, int)
+        keep = non_max_suppression(boxes, np.array(scores, np.float32))
+        keep = sorted(keep, key=lambda i: order_keys[i])
+        left, top = frame.origin
+        results[name] = [(int(left + boxes[i, 0] + boxes[i, 2] // 2), int(top + boxes[i, 1] + boxes[i, 3] // 2))
+                         for i in keep]
+    return results
+
+
+class ChangeDetector:
+    """Cheap test for "has the screen materially changed since last time".
+
+    The frame is shrunk to a thumbnail where each pixel is the mean of a
+    block of the screen, and compared with the thumbnail of the last frame
+    that was reported as changed. A frame counts as changed when enough
+    blocks moved by more than pixel_threshold, or when the reference is
+    older than max_age seconds.
+    """
+
+    def __init__(self, size=(80, 50), pixel_threshold=8, min_blocks=1, max_age=60):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_blocks = min_blocks
+        self.max_age = max_age
+        self.reference = None
+        self.reference_time = 0
+
+    def changed(self, frame):
+        thumb = cv2.resize(frame.gray, self.size, interpolation=cv2.INTER_AREA)
+        if (self.reference is None or self.reference.shape != thumb.shape
+                or frame.timestamp - self.reference_time > self.max_age):
+            is_changed = True
+        else:
+            diff = cv2.absdiff(thumb, self.reference)
+            is_changed = np.count_nonzero(diff > self.pixel_threshold) >= self.min_blocks
+        if is_changed:
+            self.reference = thumb
+            self.reference_time = frame.timestamp
+        return is_changed
+
+    def reset(self):
+        self.reference = None
+
+
+# Public event markers are drawn in the HUD's amber/yellow (OpenCV HSV, hue 0-180)
+EVENT_HSV_LOWER = (18, 90, 170)
+EVENT_HSV_UPPER = (40, 255, 255)
+EVENT_CONFIRM_SLACK = 0.2 # How far below the event templates' confidence a colour candidate may score and still count
+
+
+class EventMarkerDetector:
+    """Finds public event markers on the map by colour instead of templates.
+
+    One HSV threshold over the frame, then connected components filtered by
+    size, aspect ratio and how much of their box they fill, so new marker
+    variants are picked up as long as they keep the event colour. Size limits
+    are for a 1280x800 client area and scaled with the frame's game size;
+    calibrate() derives them from the event icon templates. Given the event
+    templates, detect() also matches them around each candidate, so other
+    amber UI (menu icon, overweight dialog) isn't taken for a marker.
+    """
+
+    def __init__(self, lower=EVENT_HSV_LOWER, upper=EVENT_HSV_UPPER):
+        self.lower = np.array(lower, np.uint8)
+        self.upper = np.array(upper, np.uint8)
+        self.kernel = np.ones((3, 3), np.uint8)
+        # Defaults measured on lowresicon, lowresicon1 and mutieevent
+        self.min_side, self.max_side = 12, 40
+        self.min_area, self.max_area = 130, 900
+        self.min_aspect, self.max_aspect = 0.6, 1.6
+        self.min_fill = 0.35
+
+    def _components(self, bgr):
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+        return self._components_hsv(hsv)
+
+    def _components_hsv(self, hsv):
+        mask = cv2.inRange(hsv, self.lower, self.upper)
+        # Close the gaps the icon outlines leave inside the marker
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        return stats[1:] # Row 0 is the background
+
+    def calibrate(self, templates):
+        """Sets the size limits from event icon Templates (largest blob of each)."""
+        blobs = []
+        for template in templates:
+            stats = self._components(template.bgr)
+            if len(stats):
+                blobs.append(stats[np.argmax(stats[:, cv2.CC_STAT_AREA])] / template.scale)
+        if not blobs:
+            return self
+        blobs = np.array(blobs)
+        sides = blobs[:, [cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT]]
+        areas = blobs[:, cv2.CC_STAT_AREA]
+        aspects = sides[:, 0] / sides[:, 1]
+        self.min_side, self.max_side = int(sides.min() * 0.6), int(np.ceil(sides.max() * 1.5))
+        self.min_area, self.max_area = int(areas.min() * 0.5), int(np.ceil(areas.max() * 1.5))
+        self.min_aspect, self.max_aspect = min(0.6, aspects.min() * 0.8), max(1.6, aspects.max() * 1.25)
+        self.min_fill = min(0.35, float((areas / (sides[:, 0] * sides[:, 1])).min()) * 0.8)
+        return self
+
+    @staticmethod
+    def _confirmed(frame, box, templates):
+        # Best event template score in a window around the candidate blob
+        left, top, width, height = box
+        pad = max(max(t.width, t.height) for t in templates)
+        x0, y0 = max(0, left + width // 2 - pad), max(0, top + height // 2 - pad)
+        window = frame.bgr[y0:y0 + 2 * pad, x0:x0 + 2 * pad]
+        for template in templates:
+            if window.shape[0] < template.height or window.shape[1] < template.width:
+                continue
+            if _scores(window, template.bgr, template.mask).max() >= template.confidence - EVENT_CONFIRM_SLACK:
+                return True
+        return False
+
+    def detect(self, frame, templates=None):
+        """Returns the screen centre (x, y) of every event marker, top-to-bottom, left-to-right.
+
+        templates: event Templates at the frame's game size, candidates none of them matches are dropped.
+        """
+        stats = self._components_hsv(frame.hsv)
+        if not len(stats):
+            return []
+        scale = ui_scale(frame.game_size)
+        widths, heights = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+        areas = stats[:, cv2.CC_STAT_AREA]
+        aspects = widths / heights
+        fills = areas / (widths * heights)
+        keep = ((np.minimum(widths, heights) >= self.min_side * scale)
+                & (np.maximum(widths, heights) <= self.max_side * scale)
+                & (areas >= self.min_area * scale * scale) & (areas <= self.max_area * scale * scale)
+                & (aspects >= self.min_aspect) & (aspects <= self.max_aspect)
+                & (fills >= self.min_fill))
+        stats = stats[keep]
+        if templates:
+            stats = stats[[self._confirmed(frame, box, templates) for box in stats[:, :4]]].reshape(-1, stats.shape[1])
+        xs = stats[:, cv2.CC_STAT_LEFT] + stats[:, cv2.CC_STAT_WIDTH] // 2 + frame.origin[0]
+        ys = stats[:, cv2.CC_STAT_TOP] + stats[:, cv2.CC_STAT_HEIGHT] // 2 + frame.origin[1]
+        order = np.lexsort((xs, ys))
+        return [(int(xs[i]), int(ys[i])) for i in order]
@@ -0,0 +1,41 @@
+import pytest
+
+from game import CancelToken, GameExited
+from inputengine import InputEngine, RecordingBackend
+
+
+def cancelling_engine():
+    # Engine whose held waits are cut short by a game exit
+    token = CancelToken()
+    backend = RecordingBackend()
+
+    def sleep(seconds):
+        token.cancel("Game exited")
+        token.sleep(seconds)
+
+    return InputEngine(backend, sleep=sleep), backend
+
+
+@pytest.mark.parametrize("action", [
+    lambda engine: engine.press("c", 0.1),
+    lambda engine: engine.chord(["LEFT_SHIFT", "SEMICOLON"]),
+    lambda engine: engine.click(10, 20, hold=0.1),
+])
+def test_cancelled_hold_still_releases(action):
+    engine, backend = cancelling_engine()
+    with pytest.raises(GameExited):
+        action(engine)
+    held = set()
+    for event in backend.events():
+        if event[0] in ("key", "button"):
+            (held.add if event[2] else held.discard)(event[:2])
+    assert not held
+
+
+def test_left_arrow_and_left_button_releases_are_not_mixed_up():
+    backend = RecordingBackend()
+    engine = InputEngine(backend, sleep=lambda seconds: None)
+    engine.press("left", 0.1)
+    engine.click(10, 10, hold=0.1)
+    assert backend.sent[-1][1] == (("button", "LEFT", False),)
+    assert ("button", "LEFT", True) in backend.events()
@@ -0,0 +1,26 @@
+import pytest
+
+from keywords import ui_keywords
+
+
+@pytest.mark.parametrize("text, category", [
+    ("leading the way", "loading"),
+    ("prevent the eventual", "event"),
+    ("events nearby", "event"),
+    ("loadings", "loading"),
+])
+def test_english_neighbours_do_not_switch_state(text, category):
+    assert ui_keywords.classify(text).count(category) == 0
+
+
+@pytest.mark.parametrize("text, category", [
+    ("loading...", "loading"),
+    ("event: radiation rumble", "event"),
+    ("public event", "event"),
+])
+def test_state_keywords_read_exactly(text, category):
+    assert ui_keywords.classify(text).count(category) == 1
+
+
+def test_misread_letter_still_counts_elsewhere():
+    assert ui_keywords.classify("distingulshed guests").count("badevent") == 2
@@ -0,0 +1,33 @@
+import pytest
+
+import timing
+from game import CancelToken, GameExited
+from inputengine import InputEngine, RecordingBackend
+from macros import Macro, MacroRunner, Key, Wait
+
+
+def held_keys(backend):
+    held = set()
+    for event in backend.events():
+        if event[0] in ("key", "button"):
+            (held.add if event[2] else held.discard)(event[:2])
+    return held
+
+
+def test_cancelled_macro_releases_everything_held():
+    clock = timing.FakeClock()
+    token = CancelToken()
+    backend = RecordingBackend()
+    engine = InputEngine(backend, sleep=token.sleep)
+
+    def sleep(seconds, label=None):
+        if held_keys(backend) and clock.now() > 1: # Game exits while "a" is held
+            token.cancel("Game exited")
+        token.check()
+        clock.sleep(seconds)
+
+    runner = MacroRunner(engine, sleep=sleep, clock=clock.now)
+    macro = Macro("hold", [Key("w", 1.0), Wait(0.1), Key("a", 0.5), Key("enter", 0)])
+    with pytest.raises(GameExited):
+        runner.run(macro)
+    assert backend.events() and not held_keys(backend)
@@ -0,0 +1,47 @@
+import numpy as np
+
+import readtext
+
+
+def game_mask(*lines):
+    # 800px tall game mask with a lit block per (top, height, width) line
+    mask = np.zeros((800, 1280), dtype=np.uint8)
+    for top, height, width in lines:
+        mask[top:top + height, 100:100 + width] = 255
+    return mask
+
+
+def test_small_line_found_on_its_own_mask():
+    regions = readtext.text_regions(game_mask((100, 11, 120), (300, 40, 400)))
+    assert len(regions) == 2
+
+
+def test_small_line_kept_in_stacked_palettes():
+    mask = game_mask((100, 11, 120), (300, 40, 400))
+    gap = np.zeros((readtext.PALETTE_GAP, mask.shape[1]), dtype=np.uint8)
+    stacked = np.vstack([mask, gap, np.zeros_like(mask)])
+    regions = readtext.text_regions(stacked, mask.shape[0])
+    assert len(regions) == 2
+    (small, _), (big, _) = regions
+    assert small[1] <= 100 and small[1] + small[3] >= 111
+    assert big[1] <= 300 and big[1] + big[3] >= 340
+
+
+class RecordingSpotter:
+    def __init__(self):
+        self.learned = []
+
+    def wants(self, token):
+        return True
+
+    def learn(self, mask, box, token, game_height):
+        self.learned.append(token)
+
+
+def test_only_confident_words_are_learned(monkeypatch):
+    spotter = RecordingSpotter()
+    monkeypatch.setattr(readtext, "keyword_spotter", spotter)
+    words = [readtext.ocr.Word("loading", readtext.CONFIDENT_READ + 5, 0, 0, 40, 10, 0),
+             readtext.ocr.Word("evemt", readtext.CONFIDENT_READ - 30, 50, 0, 40, 10, 0)]
+    readtext.learn_keywords(np.zeros((800, 1280), dtype=np.uint8), words, 800)
+    assert spotter.learned == ["loading"]
@@ -0,0 +1,67 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import vision
+
+
+class Named:
+    def __init__(self, group, name):
+        self.group, self.name = group, name
+
+
+class Sized:
+    width, height = 1280, 800
+
+
+def settled(roi, group):
+    key = vision.RoiIndex.key(Named(group, f"{group}.png"), Sized())
+    for _ in range(vision.ROI_SETTLE_HITS * 4):
+        roi.record(key, [(100, 100, 20, 20)])
+    return key
+
+
+def test_settled_icon_only_rescans_now_and_then():
+    roi = vision.RoiIndex()
+    key = settled(roi, "score")
+    scans = [roi.should_full_scan(key) for _ in range(vision.ROI_FULL_SCAN_EVERY)]
+    assert scans.count(True) == 1
+
+
+def test_popup_icons_always_rescan_on_a_miss():
+    roi = vision.RoiIndex()
+    key = settled(roi, "ok")
+    assert all(roi.should_full_scan(key) for _ in range(vision.ROI_FULL_SCAN_EVERY))
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return vision.TemplateRegistry(lambda path: os.path.join(SRC, path)).load()
+
+
+def icon_frame(filename):
+    # The icon alone on a dark 1280x800 game area
+    image = cv2.imread(os.path.join(SRC, "icons", filename))
+    canvas = np.zeros((800, 1280, 3), np.uint8)
+    canvas[300:300 + image.shape[0], 400:400 + image.shape[1]] = image
+    return vision.Frame(cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB), game_size=(1280, 800))
+
+
+@pytest.mark.parametrize("filename", vision.ICON_SPECS["event"][0])
+def test_event_icons_are_markers(registry, filename):
+    detector = vision.EventMarkerDetector().calibrate(registry.get("event"))
+    frame = icon_frame(filename)
+    assert len(detector.detect(frame, registry.get("event", frame.game_size))) == 1
+
+
+@pytest.mark.parametrize("filename", [filename for group, (files, _) in vision.ICON_SPECS.items() if group != "event"
+                                      for filename in files if os.path.exists(os.path.join(SRC, "icons", filename))])
+def test_other_icons_are_not_markers(registry, filename):
+    detector = vision.EventMarkerDetector().calibrate(registry.get("event"))
+    frame = icon_frame(filename)
+    assert detector.detect(frame, registry.get("event", frame.game_size)) == []